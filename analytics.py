@@ -0,0 +1,219 @@
+"""Sales rollups kept up to date as orders change.
+
+``daily_sales`` holds units, revenue and order counts per IST day,
+product and payment method; ``daily_order_totals`` holds order counts and
+revenue per IST day and payment method. Every order that is not
+cancelled is counted. Order events (see tasks.py) carry an
+``order_snapshot()`` and apply it with ``apply_snapshot()`` from the job
+worker; ``rebuild()`` recomputes both tables from ``orders`` with
+set-based SQL, including archived orders.
+"""
+from datetime import date, datetime, timedelta
+
+import pytz
+from sqlalchemy import select, insert, delete, func, union_all, exists
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Order, OrderItem, OrderArchive, OrderItemArchive, Product, DailySales, DailyOrderTotals
+
+IST = pytz.timezone("Asia/Kolkata")
+UNCOUNTED_STATUSES = {"cancelled"}
+TOP_PRODUCTS = 10
+MAX_RANGE_DAYS = 366 * 3
+
+
+def counts_towards_sales(order_status):
+    return (order_status or "pending") not in UNCOUNTED_STATUSES
+
+
+def ist_day(created_at):
+    """IST calendar day of an order.
+
+    Aware datetimes are converted; naive ones are stored IST wall time
+    (see ``create_order``) and used as is.
+    """
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(IST)
+    return created_at.date()
+
+
+def order_lines(order):
+    """``(product_id, units, revenue)`` for each product in an order."""
+    if order.items:
+        return [(item.product_id, item.quantity, item.line_total) for item in order.items]
+    return [(order.product_id, order.quantity, order.total_amount)]
+
+
+def _increment(model, keys, deltas):
+    """``INSERT ... ON CONFLICT DO UPDATE SET col = col + delta`` for one rollup row."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert_fn = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert_fn(model).values(**keys, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={col: getattr(model, col) + stmt.excluded[col] for col in deltas},
+        )
+        db.session.execute(stmt)
+        return
+
+    # Other backends: update, then insert if the row did not exist yet
+    updated = db.session.query(model).filter_by(**keys).update(
+        {getattr(model, col): getattr(model, col) + delta for col, delta in deltas.items()},
+        synchronize_session=False,
+    )
+    if not updated:
+        db.session.execute(insert(model).values(**keys, **deltas))
+
+
+def order_snapshot(order):
+    """Everything the rollups need about an order, as JSON-friendly data.
+
+    Events carry this instead of an order id so they can be applied
+    after the order has changed again or been deleted.
+    """
+    return dict(
+        day=ist_day(order.created_at).isoformat(),
+        payment_method=order.payment_method,
+        total_amount=order.total_amount,
+        lines=order_lines(order),
+    )
+
+
+def apply_snapshot(snapshot, sign=1):
+    """Add (sign=1) or remove (sign=-1) an order's contribution to the rollups.
+
+    Does not commit.
+    """
+    day = date.fromisoformat(snapshot["day"])
+    payment_method = snapshot["payment_method"]
+    for product_id, units, revenue in snapshot["lines"]:
+        _increment(
+            DailySales,
+            dict(day=day, product_id=product_id, payment_method=payment_method),
+            dict(orders=sign, units=sign * units, revenue=sign * revenue),
+        )
+    _increment(
+        DailyOrderTotals,
+        dict(day=day, payment_method=payment_method),
+        dict(orders=sign, revenue=sign * snapshot["total_amount"]),
+    )
+
+
+def apply_status_change(snapshot, old_status, new_status):
+    """Adjust the rollups when an order moves into or out of a cancelled state."""
+    was_counted = counts_towards_sales(old_status)
+    is_counted = counts_towards_sales(new_status)
+    if was_counted != is_counted:
+        apply_snapshot(snapshot, 1 if is_counted else -1)
+
+
+def _counted(order):
+    return func.coalesce(order.order_status, "pending").notin_(UNCOUNTED_STATUSES)
+
+
+def _line_selects(order, item):
+    return [
+        select(order.created_at, item.product_id, order.payment_method,
+               item.quantity.label("units"), item.line_total.label("revenue"))
+        .join(order, order.id == item.order_id)
+        .where(_counted(order)),
+        # Orders placed before line items existed
+        select(order.created_at, order.product_id, order.payment_method,
+               order.quantity.label("units"), order.total_amount.label("revenue"))
+        .where(_counted(order), ~exists().where(item.order_id == order.id)),
+    ]
+
+
+def rebuild():
+    """Recompute both rollup tables from hot and archived orders in one transaction."""
+    lines = union_all(
+        *_line_selects(Order, OrderItem),
+        *_line_selects(OrderArchive, OrderItemArchive),
+    ).subquery()
+    orders = union_all(*(
+        select(order.created_at, order.payment_method, order.total_amount).where(_counted(order))
+        for order in (Order, OrderArchive)
+    )).subquery()
+    line_day = func.date(lines.c.created_at)
+    order_day = func.date(orders.c.created_at)
+
+    db.session.execute(delete(DailySales))
+    db.session.execute(delete(DailyOrderTotals))
+    db.session.execute(insert(DailySales).from_select(
+        ["day", "product_id", "payment_method", "orders", "units", "revenue"],
+        select(line_day, lines.c.product_id, lines.c.payment_method,
+               func.count(), func.sum(lines.c.units), func.sum(lines.c.revenue))
+        .group_by(line_day, lines.c.product_id, lines.c.payment_method),
+    ))
+    db.session.execute(insert(DailyOrderTotals).from_select(
+        ["day", "payment_method", "orders", "revenue"],
+        select(order_day, orders.c.payment_method, func.count(), func.sum(orders.c.total_amount))
+        .group_by(order_day, orders.c.payment_method),
+    ))
+    db.session.commit()
+    return db.session.query(func.count()).select_from(DailyOrderTotals).scalar()
+
+
+def parse_range(date_from, date_to):
+    """Inclusive ``(first, last)`` days; defaults to the last 30 IST days."""
+    today = datetime.now(IST).date()
+    last = date.fromisoformat(date_to) if date_to else today
+    first = date.fromisoformat(date_from) if date_from else last - timedelta(days=29)
+    if first > last:
+        raise ValueError("date_from is after date_to")
+    if (last - first).days > MAX_RANGE_DAYS:
+        raise ValueError(f"Range cannot exceed {MAX_RANGE_DAYS} days")
+    return first, last
+
+
+def sales_summary(first, last, top=TOP_PRODUCTS):
+    """Revenue, order counts and top products for ``first..last`` from the rollups only."""
+    def in_range(model):
+        return model.day >= first, model.day <= last
+
+    by_day = db.session.execute(
+        select(DailyOrderTotals.day, func.sum(DailyOrderTotals.orders), func.sum(DailyOrderTotals.revenue))
+        .where(*in_range(DailyOrderTotals))
+        .group_by(DailyOrderTotals.day)
+        .having(func.sum(DailyOrderTotals.orders) != 0)
+        .order_by(DailyOrderTotals.day)
+    ).all()
+    by_method = db.session.execute(
+        select(DailyOrderTotals.payment_method, func.sum(DailyOrderTotals.orders),
+               func.sum(DailyOrderTotals.revenue))
+        .where(*in_range(DailyOrderTotals))
+        .group_by(DailyOrderTotals.payment_method)
+        .having(func.sum(DailyOrderTotals.orders) != 0)
+    ).all()
+    top_rows = db.session.execute(
+        select(DailySales.product_id, func.sum(DailySales.orders),
+               func.sum(DailySales.units), func.sum(DailySales.revenue))
+        .where(*in_range(DailySales))
+        .group_by(DailySales.product_id)
+        .having(func.sum(DailySales.orders) != 0)
+        .order_by(func.sum(DailySales.units).desc())
+        .limit(top)
+    ).all()
+
+    names = {}
+    if top_rows:
+        names = dict(db.session.execute(
+            select(Product.id, Product.name).where(Product.id.in_([r[0] for r in top_rows]))
+        ).all())
+
+    return dict(
+        date_from=first.isoformat(),
+        date_to=last.isoformat(),
+        orders=sum(r[1] for r in by_day),
+        revenue=sum(r[2] for r in by_day),
+        units=db.session.execute(
+            select(func.coalesce(func.sum(DailySales.units), 0)).where(*in_range(DailySales))
+        ).scalar(),
+        by_day=[dict(day=str(d), orders=o, revenue=r) for d, o, r in by_day],
+        by_payment_method=[dict(payment_method=m, orders=o, revenue=r) for m, o, r in by_method],
+        top_products=[
+            dict(product_id=pid, name=names.get(pid, f"Product {pid}"), orders=o, units=u, revenue=r)
+            for pid, o, u, r in top_rows
+        ],
+    )
@@ -1,42 +1,84 @@
 # ──────────────  IMPORTS  ──────────────
-import os, logging, redis, pytz
-from datetime import datetime
+import os, logging, redis, pytz, click
+from datetime import datetime, timezone, timedelta
 from sqlalchemy.exc import IntegrityError
 
 from flask import (
     Flask, render_template, request, jsonify,
-    session, redirect, url_for, flash
+    session, redirect, url_for, flash, make_response,
+    Response, stream_with_context
 )
 from flask_session import Session
+from session_scope import ScopedSessionInterface
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-from models import db, Product, Order   # keeps the original db instance
+from models import db, Product, Order, normalize_phone   # keeps the original db instance
+from order_queries import parse_order_filters, page_orders, DEFAULT_PAGE_SIZE
+from checkout import CheckoutError, customer_fields, parse_lines, place_order
+from cache import catalog_cache, tracking_cache
+from migrations import upgrade
+from order_export import export_rows, FORMATS as EXPORT_FORMATS
+import config
+import serializers
+import analytics
+import metrics
+import assets
+import idempotency
+import jobs
+import tasks
+import reaper
+import archive
+from order_batch import parse_batch, apply_batch
+from inventory import release_lines, InsufficientStock
+from product_search import parse_search_filters, search_products, search_facets, SEARCH_PAGE_SIZE
+from catalog_import import bulk_upsert, READERS, PLACEHOLDER_IMG
 
 # ──────────────  BASIC CONFIG  ──────────────
-logging.basicConfig(level=logging.DEBUG)
+# DEBUG logging costs real throughput; opt in with LOG_LEVEL=DEBUG locally
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 
 app = Flask(__name__)
 app.secret_key = os.getenv("SESSION_SECRET", "dev-secret-key-change-in-production")
+app.json = serializers.OrjsonProvider(app)   # orjson encoding/decoding
+metrics.init_app(app)          # latency/SQL/template timings, /metrics, Server-Timing
+assets.init_app(app)           # hashed /assets, asset_url(), gzip/br responses, `flask build-assets`
 
 # ──────────────  SESSION CONFIG  ──────────────
 if os.getenv("REDIS_URL"):                       # Render / production
     app.config["SESSION_TYPE"] = "redis"
-    app.config["SESSION_REDIS"] = redis.from_url(
-        os.environ["REDIS_URL"], decode_responses=True
-    )
+    # One bounded pool shared by sessions, caches and the job queue; raw bytes
+    # because Flask-Session stores pickles
+    app.config["SESSION_REDIS"] = redis.Redis(connection_pool=redis.BlockingConnectionPool.from_url(
+        os.environ["REDIS_URL"],
+        max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "20")),
+        timeout=5,
+        health_check_interval=30,
+    ))
 else:                                            # Local development fallback
     app.config["SESSION_TYPE"] = "filesystem"
 
 app.config["SESSION_PERMANENT"] = False
+# Admin sessions expire this long after login
+app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(hours=int(os.getenv("ADMIN_SESSION_HOURS", "12")))
+app.config["SESSION_COOKIE_HTTPONLY"] = True
+app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
 Session(app)
+# Only /admin paths load or save the session (see session_scope.py)
+app.session_interface = ScopedSessionInterface(app.session_interface)
+
+# The caches share the session Redis connection when there is one
+catalog_cache.init_redis(app.config.get("SESSION_REDIS"))
+tracking_cache.init_redis(app.config.get("SESSION_REDIS"))
+idempotency.init_redis(app.config.get("SESSION_REDIS"))
+
+# Post-order side effects run in the job worker (Redis queue or DB table)
+jobs.init_app(app, app.config.get("SESSION_REDIS"))
 
 # ──────────────  DATABASE CONFIG  ──────────────
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "sqlite:///site.db")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+# Pool sized to the gunicorn worker's concurrency (see config.py)
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = config.engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
 db.init_app(app)          # make sure this comes *after* the config
 
 # ──────────────  OTHER GLOBALS  ──────────────
@@ -84,28 +126,76 @@ DEFAULT_PRODUCTS = [
         stock=10
     ),
 ]
-PLACEHOLDER_IMG = "https://via.placeholder.com/400x300/6c757d/ffffff?text=Cookware+Item"
-
-with app.app_context():
-    # Create database tables
-    db.create_all()
-    
-    # Add default products if none exist
-    if Product.query.count() == 0:
-        for p in DEFAULT_PRODUCTS:
-            db.session.add(Product(**p))
-        db.session.commit()
-        app.logger.info("Default products added to database")
+
+
+def init_db():
+    """Create tables, apply upgrades and seed the default catalog; safe to re-run."""
+    with app.app_context():
+        db.create_all()
+
+        # Columns/indexes added since a table was first created, plus backfills
+        upgrade()
+
+        # Add default products if none exist
+        if Product.query.count() == 0:
+            for p in DEFAULT_PRODUCTS:
+                db.session.add(Product(**p))
+            db.session.commit()
+            app.logger.info("Default products added to database")
+
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Create/upgrade the schema and seed defaults (once per deploy, before the workers start)."""
+    init_db()
+    print("Database ready")
+
 
 # ──────────────────  ROUTES  ──────────────────
+def load_catalog():
+    """First page of the storefront; the rest is fetched from /products/search."""
+    products, next_cursor = search_products(parse_search_filters({}))
+    return dict(products=products, next_cursor=next_cursor)
+
+
 @app.route("/")
 def index():
     try:
-        products = [p.to_dict() for p in Product.query.all()]
-        return render_template("index.html", products=products)
+        entry = catalog_cache.get(load_catalog)
     except Exception as e:
         app.logger.error(f"Error loading products: {e}")
-        return render_template("index.html", products=[], error="Unable to load products")
+        return render_template("index.html", products=[], next_cursor=None, error="Unable to load products")
+
+    # Render once per catalog version and build per worker; the ETag covers
+    # both, so new templates or hashed asset URLs are never answered with a 304
+    build = assets.build_id()
+    html = entry.derived.get(("index", build))
+    if html is None:
+        html = entry.derived[("index", build)] = render_template("index.html", **entry.value)
+
+    resp = make_response(html)
+    resp.set_etag(f"{entry.etag}-{build}")
+    resp.last_modified = datetime.fromtimestamp(entry.built_at, timezone.utc)
+    resp.cache_control.public = True
+    resp.cache_control.no_cache = True          # always revalidate, usually a 304
+    return resp.make_conditional(request)
+
+
+@app.route("/products/search")
+def products_search():
+    try:
+        filters = parse_search_filters(request.args)
+        cursor = request.args.get("cursor")
+        limit = request.args.get("limit", SEARCH_PAGE_SIZE, type=int)
+        products, next_cursor = search_products(filters, cursor, limit)
+        # Facets describe the whole result set; only the first page needs them
+        facets = None if cursor else search_facets(filters)
+        return jsonify(success=True, products=products, next_cursor=next_cursor, facets=facets)
+    except ValueError as e:
+        return jsonify(success=False, message=str(e)), 400
+    except Exception as e:
+        app.logger.error(f"Error searching products: {e}")
+        return jsonify(success=False, message="Error searching products"), 500
 
 
 # ----------  ADMIN AUTH  ----------
@@ -137,26 +227,37 @@ def admin_logout():
 
 @app.route("/admin/session-check", methods=["GET"])
 def admin_session_check():
-    return jsonify(is_admin=session.get("is_admin", False), session_data=dict(session))
+    return jsonify(is_admin=session.get("is_admin", False))
 
 
 # ----------  PRODUCT CRUD (ADMIN) ----------
 @app.route("/admin/products/update", methods=["POST"])
 def update_products():
-    app.logger.debug(f"Session data: {dict(session)}")
     if not session.get("is_admin"):
         app.logger.warning("Unauthorized access attempt to product update")
         return jsonify(success=False, message="Unauthorized access"), 403
 
     try:
         data = request.get_json()
-        app.logger.debug(f"Received product update data: {data}")
         
         if not data or "products" not in data:
             return jsonify(success=False, message="Invalid request data"), 400
             
         products_data = data.get("products", [])
+
+        # Bulk mode: chunked bulk insert/update with per-row validation errors
+        if data.get("mode") == "bulk":
+            report = bulk_upsert(products_data)
+            catalog_cache.bump()
+            app.logger.info(f"Bulk product update: {report['inserted']} inserted, "
+                            f"{report['updated']} updated, {report['failed']} failed")
+            return jsonify(success=True, **report)
+
         updated_count = 0
+
+        # One query for every product being edited instead of one per row
+        ids = [int(p["id"]) for p in products_data if p.get("id") and str(p["id"]).isdigit()]
+        existing = {p.id: p for p in Product.query.filter(Product.id.in_(ids))} if ids else {}
         
         # Update existing products and add new ones
         for prod in products_data:
@@ -171,7 +272,7 @@ def update_products():
                     product_id = prod.get("id")
                     if product_id and str(product_id).isdigit():
                         # Update existing product
-                        existing_product = Product.query.get(int(product_id))
+                        existing_product = existing.get(int(product_id))
                         if existing_product:
                             existing_product.name = prod["name"].strip()
                             existing_product.description = prod.get("description", "Premium cookware item").strip()
@@ -179,7 +280,6 @@ def update_products():
                             existing_product.stock = stock
                             existing_product.image = prod.get("image", PLACEHOLDER_IMG).strip() or PLACEHOLDER_IMG
                             updated_count += 1
-                            app.logger.debug(f"Updated product {product_id}: {existing_product.name}")
                     else:
                         # Add new product
                         new_product = Product(
@@ -191,12 +291,12 @@ def update_products():
                         )
                         db.session.add(new_product)
                         updated_count += 1
-                        app.logger.debug(f"Added new product: {new_product.name}")
                 except (ValueError, TypeError) as e:
                     app.logger.error(f"Error processing product {prod}: {e}")
                     continue
                     
         db.session.commit()
+        catalog_cache.bump()
         app.logger.info(f"Successfully updated {updated_count} products")
         return jsonify(success=True, message=f"Products updated successfully ({updated_count} products)")
     except Exception as e:
@@ -205,6 +305,52 @@ def update_products():
         return jsonify(success=False, message=f"Error updating products: {str(e)}"), 500
 
 
+@app.route("/admin/products/import", methods=["POST"])
+def import_products():
+    """Stream a CSV or JSON-lines catalog file into the bulk upsert pipeline.
+
+    Accepts a multipart upload in the ``file`` field or a raw request body;
+    the format comes from ``?format=`` or the uploaded file's extension.
+    """
+    if not session.get("is_admin"):
+        return jsonify(success=False, message="Unauthorized access"), 403
+
+    upload = request.files.get("file")
+    fmt = request.args.get("format", "").lower()
+    if not fmt and upload and upload.filename:
+        fmt = upload.filename.rsplit(".", 1)[-1].lower()
+    reader = READERS.get(fmt)
+    if reader is None:
+        return jsonify(success=False, message="Format must be csv or jsonl"), 400
+
+    try:
+        report = bulk_upsert(reader(upload.stream if upload else request.stream))
+        catalog_cache.bump()
+        app.logger.info(f"Product import: {report['inserted']} inserted, "
+                        f"{report['updated']} updated, {report['failed']} failed")
+        return jsonify(success=True, **report)
+    except (UnicodeDecodeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify(success=False, message=f"Could not read file: {e}"), 400
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error importing products: {e}")
+        return jsonify(success=False, message="Error importing products"), 500
+
+
+@app.route("/admin/products/stock")
+def admin_product_stock():
+    """Live stock for ``?ids=1,2,3``; the home page editor's copy comes from the catalog cache."""
+    if not session.get("is_admin"):
+        return jsonify(success=False, message="Unauthorized access"), 403
+
+    ids = [int(i) for i in request.args.get("ids", "").split(",") if i.strip().isdigit()]
+    if not ids:
+        return jsonify(success=True, stock={})
+    rows = Product.query.with_entities(Product.id, Product.stock).filter(Product.id.in_(ids))
+    return jsonify(success=True, stock={str(row.id): row.stock for row in rows})
+
+
 # ----------  ORDER FLOW ----------
 @app.route("/order-form/<int:product_id>")
 def order_form(product_id):
@@ -218,22 +364,16 @@ def order_form(product_id):
 
 
 @app.route("/order/create", methods=["POST"])
+@idempotency.idempotent
 def create_order():
+    """Single-product checkout used by order_form.html (a one-line cart)."""
     try:
         data = request.get_json()
         if not data:
             return jsonify(success=False, message="Invalid request data"), 400
 
-        # Validate required fields
-        required_fields = ["product_id", "customer_name", "customer_phone", "payment_method"]
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify(success=False, message=f"Missing required field: {field}"), 400
-
-        # Validate product exists
-        product = Product.query.get(int(data["product_id"]))
-        if not product:
-            return jsonify(success=False, message="Product not found"), 404
+        if not data.get("product_id"):
+            return jsonify(success=False, message="Missing required field: product_id"), 400
 
         # Validate quantity
         try:
@@ -243,45 +383,48 @@ def create_order():
         except (ValueError, TypeError):
             return jsonify(success=False, message="Invalid quantity"), 400
 
-        # Check stock availability
-        if product.stock < qty:
-            return jsonify(success=False, message=f"Only {product.stock} items available in stock"), 400
-
-        # Calculate total
-        total = product.price * qty
-
-        # Create order with IST timezone
-        ist_time = datetime.now(IST)
-        order = Order(
-            customer_name=data["customer_name"].strip(),
-            customer_phone=data["customer_phone"].strip(),
-            customer_email=data.get("customer_email", "").strip() or None,
-            product_id=product.id,
-            product_name=product.name,
-            quantity=qty,
-            total_amount=total,
-            payment_method=data["payment_method"].strip(),
-            customer_address=data.get("customer_address", "").strip() or None,
-            notes=data.get("notes", "").strip() or None,
-            upi_transaction_id=data.get("upi_transaction_id", "").strip() or None,
-            created_at=ist_time,
-        )
-        
-        # Deduct stock
-        product.stock -= qty
-        
-        db.session.add(order)
-        db.session.commit()
-
-        app.logger.info(f"Order created: ID {order.id}, Customer: {order.customer_name}")
-        return jsonify(success=True, order_id=order.id, total_amount=total, message="Order created successfully")
-        
+        return _checkout(data, {int(data["product_id"]): qty})
     except Exception as e:
         db.session.rollback()
         app.logger.error(f"Error creating order: {e}")
         return jsonify(success=False, message="Error creating order"), 500
 
 
+@app.route("/cart/checkout", methods=["POST"])
+@idempotency.idempotent
+def cart_checkout():
+    """Create one order with several product lines in a single transaction."""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify(success=False, message="Invalid request data"), 400
+
+        try:
+            quantities = parse_lines(data.get("items"))
+        except CheckoutError as e:
+            return jsonify(success=False, message=e.message), e.status
+
+        return _checkout(data, quantities)
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error during checkout: {e}")
+        return jsonify(success=False, message="Error creating order"), 500
+
+
+def _checkout(data, quantities):
+    try:
+        order = place_order(customer_fields(data), quantities, created_at=datetime.now(IST))
+    except CheckoutError as e:
+        if e.extra.get("sold_out"):
+            catalog_cache.bump()                    # stop advertising it on the home page
+        return jsonify(success=False, message=e.message, **e.extra), e.status
+
+    tracking_cache.delete(order.customer_phone_normalized)
+    app.logger.info(f"Order created: ID {order.id}, Customer: {order.customer_name}")
+    return jsonify(success=True, order_id=order.id, total_amount=order.total_amount,
+                   items=[item.to_dict() for item in order.items], message="Order created successfully")
+
+
 # ----------  ADMIN — ORDER DASHBOARD ----------
 @app.route("/admin/orders")
 def admin_orders():
@@ -289,33 +432,108 @@ def admin_orders():
         flash("Please login as admin to access this page", "error")
         return redirect(url_for("index"))
 
+    # Orders are fetched page by page from api_list_orders(); the product
+    # editor rows are memoized on the catalog cache entry until the next bump
     try:
-        orders = [o.to_dict() for o in Order.query.order_by(Order.created_at.desc()).all()]
-        products = [p.to_dict() for p in Product.query.all()]
-        return render_template("admin_orders.html", orders=orders, products=products)
+        entry = catalog_cache.get(load_catalog)
+        products = entry.derived.get("product_editor")
+        if products is None:
+            products = entry.derived["product_editor"] = serializers.product_editor_dicts()
+        return render_template("admin_orders.html", products=products, page_size=DEFAULT_PAGE_SIZE)
     except Exception as e:
         app.logger.error(f"Error loading admin orders: {e}")
-        return render_template("admin_orders.html", orders=[], products=[], error="Unable to load orders")
+        return render_template("admin_orders.html", products=[], page_size=DEFAULT_PAGE_SIZE,
+                               error="Unable to load orders")
+
+
+@app.route("/admin/orders/api")
+def api_list_orders():
+    if not session.get("is_admin"):
+        return jsonify(success=False, message="Unauthorized"), 403
+
+    try:
+        filters = parse_order_filters(request.args)
+        orders, next_cursor = page_orders(
+            filters,
+            cursor=request.args.get("cursor") or None,
+            limit=request.args.get("limit", DEFAULT_PAGE_SIZE),
+            columns=serializers.order_select,
+        )
+        return jsonify(success=True, orders=[serializers.order_dict(o) for o in orders], next_cursor=next_cursor)
+    except ValueError as e:
+        return jsonify(success=False, message=f"Invalid filter: {e}"), 400
+    except Exception as e:
+        app.logger.error(f"Error listing orders: {e}")
+        return jsonify(success=False, message="Error listing orders"), 500
+
+
+@app.route("/admin/orders/export")
+def export_orders():
+    """Stream matching orders as CSV or NDJSON without loading them into memory."""
+    if not session.get("is_admin"):
+        return jsonify(success=False, message="Unauthorized"), 403
+
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify(success=False, message="Format must be csv or ndjson"), 400
+    try:
+        filters = parse_order_filters(request.args)
+    except ValueError as e:
+        return jsonify(success=False, message=f"Invalid filter: {e}"), 400
+
+    encode, mimetype = EXPORT_FORMATS[fmt]
+    filename = f"orders-{datetime.now(IST):%Y%m%d-%H%M%S}.{fmt}"
+    app.logger.info(f"Order export started: format={fmt}, filters={filters}")
+    return Response(
+        stream_with_context(encode(export_rows(filters))),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
 
 # ----------  CUSTOMER ORDER TRACKING ----------
 @app.route("/track-order-page")
 def track_order_page():
-    return render_template("track_order.html")
+    return render_template("track_orders.html")
+
+
+TRACKING_PAGE_SIZE = 20
 
 
 @app.route("/track-order", methods=["POST"])
 def track_order():
     try:
         data = request.get_json()
-        phone = data.get("phone", "").strip() if data else ""
+        phone = normalize_phone(str(data.get("phone") or "")) if isinstance(data, dict) else ""
         
         if not phone:
             return jsonify(success=False, message="Phone number is required"), 400
 
-        found_orders = Order.query.filter_by(customer_phone=phone).order_by(Order.created_at.desc()).all()
-        return jsonify(success=True, orders=[o.to_dict() for o in found_orders])
-        
+        cursor = data.get("cursor") or None
+        try:
+            limit = int(data.get("limit") or TRACKING_PAGE_SIZE)
+        except (TypeError, ValueError):
+            return jsonify(success=False, message="Invalid page request"), 400
+        if cursor is not None and not isinstance(cursor, str):
+            return jsonify(success=False, message="Invalid page request"), 400
+
+        # Only the default first page is cached; it is what customers refresh
+        cacheable = cursor is None and limit == TRACKING_PAGE_SIZE
+        if cacheable:
+            cached = tracking_cache.get(phone)
+            if cached is not None:
+                return jsonify(success=True, **cached)
+
+        found_orders, next_cursor = page_orders({"phone": phone}, cursor=cursor, limit=limit,
+                                                max_limit=TRACKING_PAGE_SIZE, include_archive=True,
+                                                columns=serializers.order_select)
+        result = dict(orders=[serializers.order_dict(o) for o in found_orders], next_cursor=next_cursor)
+        if cacheable:
+            tracking_cache.set(phone, result)
+        return jsonify(success=True, **result)
+
+    except (TypeError, ValueError):
+        return jsonify(success=False, message="Invalid page request"), 400
     except Exception as e:
         app.logger.error(f"Error tracking order: {e}")
         return jsonify(success=False, message="Error tracking order"), 500
@@ -337,6 +555,8 @@ def api_update_order(order_id):
         order = Order.query.get_or_404(order_id)
         data = request.get_json(silent=True) or {}
 
+        old_status, old_payment_status = order.order_status, order.payment_status
+
         # Update allowed fields
         if "payment_status" in data:
             order.payment_status = data["payment_status"]
@@ -344,10 +564,23 @@ def api_update_order(order_id):
             order.order_status = data["order_status"]
         if "notes" in data:
             order.notes = data["notes"]
-            
+
+        # Cancelling gives the units back, reopening a cancelled order takes them again
+        try:
+            restocked = reaper.sync_stock(order, old_status)
+        except InsufficientStock:
+            db.session.rollback()
+            return jsonify(success=False, message="Not enough stock left to reopen this order"), 409
+
         order.updated_at = datetime.now(IST)
+        if (order.order_status, order.payment_status) != (old_status, old_payment_status):
+            tasks.emit_order_status_changed(order, old_status, old_payment_status)
+        phone = order.customer_phone_normalized
         db.session.commit()
-        
+        tracking_cache.delete(phone)
+        if restocked:
+            catalog_cache.bump()
+
         return jsonify(success=True, message="Order updated successfully")
     except Exception as e:
         db.session.rollback()
@@ -355,6 +588,34 @@ def api_update_order(order_id):
         return jsonify(success=False, message="Error updating order"), 500
 
 
+@app.route("/admin/orders/batch", methods=["POST"])
+def api_batch_orders():
+    """Set statuses, cancel-and-restock or delete many orders in one transaction."""
+    if not session.get("is_admin"):
+        return jsonify(success=False, message="Unauthorized"), 403
+
+    try:
+        action, ids, values = parse_batch(request.get_json(silent=True) or {})
+        results, phones, restocked = apply_batch(action, ids, values)
+        for phone in phones:
+            tracking_cache.delete(phone)
+        if restocked:
+            catalog_cache.bump()
+
+        counts = {}
+        for outcome in results.values():
+            counts[outcome] = counts.get(outcome, 0) + 1
+        app.logger.info(f"Batch {action} on {len(ids)} orders: {counts}")
+        return jsonify(success=True, action=action, counts=counts,
+                       results=[dict(id=i, result=r) for i, r in results.items()])
+    except ValueError as e:
+        return jsonify(success=False, message=str(e)), 400
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error in batch order update: {e}")
+        return jsonify(success=False, message="Error updating orders"), 500
+
+
 @app.route("/admin/orders/<int:order_id>", methods=["DELETE"])
 def api_delete_order(order_id):
     if not session.get("is_admin"):
@@ -365,8 +626,17 @@ def api_delete_order(order_id):
         if not order:
             return jsonify(success=False, message="Order not found"), 404
 
+        tasks.emit_order_deleted(order)
+        # Units of an order that never shipped go back on the shelf
+        restock = reaper.holds_stock(order)
+        if restock:
+            release_lines(reaper.units_by_product([order]))
+        phone = order.customer_phone_normalized
         db.session.delete(order)
         db.session.commit()
+        tracking_cache.delete(phone)
+        if restock:
+            catalog_cache.bump()
         return jsonify(success=True, message="Order deleted successfully")
     except Exception as e:
         db.session.rollback()
@@ -386,6 +656,7 @@ def api_delete_product(prod_id):
 
         db.session.delete(prod)
         db.session.commit()
+        catalog_cache.bump()
         return jsonify(success=True, message="Product deleted successfully")
     except IntegrityError:
         db.session.rollback()
@@ -409,12 +680,58 @@ def api_get_order(order_id):
         if not order:
             return jsonify(success=False, message="Order not found"), 404
 
-        return jsonify(success=True, order=order.to_dict())
+        return jsonify(success=True, order=order.to_dict(include_items=True))
     except Exception as e:
         app.logger.error(f"Error getting order: {e}")
         return jsonify(success=False, message="Error retrieving order"), 500
 
 
+# ----------  ADMIN — SALES ANALYTICS ----------
+@app.route("/admin/analytics/sales")
+def api_sales_summary():
+    """Revenue, order counts and top products for a date range, read from the rollups."""
+    if not session.get("is_admin"):
+        return jsonify(success=False, message="Unauthorized"), 403
+
+    try:
+        first, last = analytics.parse_range(request.args.get("date_from"), request.args.get("date_to"))
+    except ValueError as e:
+        return jsonify(success=False, message=f"Invalid date range: {e}"), 400
+
+    try:
+        return jsonify(success=True, **analytics.sales_summary(first, last))
+    except Exception as e:
+        app.logger.error(f"Error loading sales summary: {e}")
+        return jsonify(success=False, message="Error loading sales summary"), 500
+
+
+@app.cli.command("rebuild-daily-sales")
+def rebuild_daily_sales_command():
+    """Recompute the daily sales rollups from the orders table."""
+    rows = analytics.rebuild()
+    print(f"Rebuilt daily sales rollups ({rows} day/payment-method rows)")
+
+
+@app.cli.command("expire-orders")
+@click.option("--ttl-minutes", type=int, default=None,
+              help=f"Age after which an unpaid order expires (default {reaper.PENDING_ORDER_TTL_MINUTES}).")
+@click.option("--batch-size", type=int, default=None, help=f"Orders per transaction (default {reaper.REAP_BATCH}).")
+def expire_orders_command(ttl_minutes, batch_size):
+    """Cancel unpaid prepaid orders past their TTL and return their stock."""
+    result = reaper.expire_unpaid_orders(ttl_minutes=ttl_minutes, batch=batch_size)
+    print(f"Expired {result['orders']} unpaid orders in {result['seconds']}s ({result['batches']} batches)")
+
+
+@app.cli.command("archive-orders")
+@click.option("--months", type=int, default=None,
+              help=f"Archive delivered/cancelled orders older than this (default {archive.ARCHIVE_AFTER_MONTHS}).")
+@click.option("--chunk-size", type=int, default=None, help=f"Orders per transaction (default {archive.ARCHIVE_CHUNK}).")
+def archive_orders_command(months, chunk_size):
+    """Move old delivered/cancelled orders to orders_archive."""
+    result = archive.archive_orders(months=months, chunk=chunk_size)
+    print(f"Archived {result['orders']} orders in {result['seconds']}s ({result['chunks']} chunks)")
+
+
 # ──────────────────  ERROR HANDLERS  ──────────────────
 @app.errorhandler(404)
 def not_found(error):
@@ -428,4 +745,5 @@ def internal_error(error):
 
 # ──────────────────  MAIN  ──────────────────
 if __name__ == "__main__":
+    init_db()
     app.run(debug=True, host="0.0.0.0", port=5000)
@@ -0,0 +1,210 @@
+"""Fingerprinted static assets and response compression.
+
+``flask build-assets`` copies every file under ``static/`` to
+``static/dist/`` with a content hash in its name, writes ``.gz`` (and
+``.br`` when the Brotli package is installed) next to each text asset,
+and records the mapping in ``static/dist/manifest.json``. Templates call
+``asset_url("css/style.css")``, which points at ``/assets/<hashed name>``
+when the manifest has it; those URLs never change content, so they are
+served with a one-year ``immutable`` Cache-Control and the best
+precompressed variant the client accepts. Without a build the helper
+falls back to the plain ``/static`` URL.
+
+``build_id()`` changes whenever the manifest or any template does; the
+home page folds it into its ETag so a deploy invalidates cached HTML that
+points at hashed files the new build no longer has.
+
+Dynamic responses (HTML, JSON, CSV, ...) of at least
+``COMPRESS_MIN_BYTES`` are compressed on the fly.
+"""
+import os, io, json, gzip, shutil, hashlib, logging, mimetypes
+
+from flask import request, url_for, send_from_directory, abort
+
+try:
+    import brotli
+except ImportError:         # optional; gzip only without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6               # on the fly; prebuilt assets use the maximum
+BROTLI_QUALITY = 5
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+COMPRESSIBLE_TYPES = {
+    "text/html", "text/css", "text/plain", "text/csv", "text/javascript",
+    "application/javascript", "application/json", "application/x-ndjson", "image/svg+xml",
+}
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+
+_manifest = {}
+_manifest_version = ""
+_template_version = ""
+
+
+# ----------  Build ----------
+def _hashed_name(path, content):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+def _write_compressed(path, content):
+    with open(path + ".gz", "wb") as f:
+        # mtime=0 keeps the .gz byte-identical across builds
+        with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=9, mtime=0) as gz:
+            gz.write(content)
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(content))
+
+
+def build_assets(static_folder):
+    """Rebuild ``static/dist`` and its manifest; returns the manifest."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist]
+        for filename in files:
+            source = os.path.join(root, filename)
+            rel = os.path.relpath(source, static_folder).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                content = f.read()
+            hashed = _hashed_name(rel, content)
+            target = os.path.join(dist, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(content)
+            if (mimetypes.guess_type(rel)[0] or "") in COMPRESSIBLE_TYPES:
+                _write_compressed(target, content)
+            manifest[rel] = hashed
+
+    with open(os.path.join(dist, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def load_manifest(static_folder):
+    global _manifest, _manifest_version
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST)) as f:
+            _manifest = json.load(f)
+    except FileNotFoundError:
+        _manifest = {}
+        logger.info("No asset manifest; serving unhashed /static files (run `flask build-assets`)")
+    _manifest_version = _digest(json.dumps(_manifest, sort_keys=True).encode())
+    return _manifest
+
+
+def load_template_version(template_folder):
+    """Hash every template's path and content; computed once at startup."""
+    global _template_version
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(template_folder):
+        dirs.sort()
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            digest.update(os.path.relpath(path, template_folder).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    _template_version = digest.hexdigest()[:12]
+    return _template_version
+
+
+def build_id():
+    """Identifies the loaded templates and asset manifest, for page ETags."""
+    return _digest(f"{_template_version}:{_manifest_version}".encode())
+
+
+def asset_url(filename):
+    hashed = _manifest.get(filename)
+    if hashed is None:
+        return url_for("static", filename=filename)
+    return url_for("asset", filename=hashed)
+
+
+# ----------  Compression ----------
+def accepted_encodings():
+    """Encodings we can produce that the client accepts, best first."""
+    available = ("br", "gzip") if brotli is not None else ("gzip",)
+    return [enc for enc in available if request.accept_encodings.quality(enc) > 0]
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) as gz:
+        gz.write(body)
+    return buf.getvalue()
+
+
+def compress_response(response):
+    if response.mimetype not in COMPRESSIBLE_TYPES or "Content-Encoding" in response.headers:
+        return response
+    response.vary.add("Accept-Encoding")
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    encodings = accepted_encodings()
+    if not encodings:
+        return response
+
+    response.set_data(compress(body, encodings[0]))
+    response.headers["Content-Encoding"] = encodings[0]
+    # Same entity, different bytes: only a weak validator still holds
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+# ----------  Serving ----------
+def serve_asset(static_folder, filename):
+    dist = os.path.join(static_folder, DIST_DIR)
+    if filename == MANIFEST or not os.path.isfile(os.path.join(dist, filename)):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    served, encoding = filename, None
+    for enc in accepted_encodings():
+        variant = f"{filename}.{'br' if enc == 'br' else 'gz'}"
+        if os.path.isfile(os.path.join(dist, variant)):
+            served, encoding = variant, enc
+            break
+
+    response = send_from_directory(dist, served, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE, conditional=True)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_app(app):
+    """Register ``/assets``, the ``asset_url`` template helper, compression and the CLI."""
+    load_manifest(app.static_folder)
+    load_template_version(os.path.join(app.root_path, app.template_folder))
+    app.jinja_env.globals["asset_url"] = asset_url
+    app.after_request(compress_response)
+
+    @app.route("/assets/<path:filename>")
+    def asset(filename):
+        return serve_asset(app.static_folder, filename)
+
+    @app.cli.command("build-assets")
+    def build_assets_command():
+        """Fingerprint and precompress everything under static/."""
+        manifest = build_assets(app.static_folder)
+        load_manifest(app.static_folder)
+        print(f"Built {len(manifest)} assets into {os.path.join(app.static_folder, DIST_DIR)}")
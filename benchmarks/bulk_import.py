@@ -0,0 +1,57 @@
+"""Time a large catalog import through /admin/products/import.
+
+Generates a CSV with --rows new products, uploads it, then uploads a
+second file that updates every one of them by id.
+
+    python benchmarks/bulk_import.py --rows 50000
+"""
+import os, io, sys, csv, json, time, argparse, tempfile, logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_csv(rows, start_id=None):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["id", "name", "description", "price", "stock", "image"])
+    for i in range(rows):
+        writer.writerow([
+            "" if start_id is None else start_id + i,
+            f"Bench product {i}", "Imported by benchmark", 100 + i % 900, i % 50,
+            f"https://example.com/img/{i}.jpg",
+        ])
+    return buf.getvalue().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/import_bench.db")
+
+    from app import app, init_db
+    from models import db, Product
+    logging.getLogger().setLevel(logging.WARNING)
+    init_db()
+
+    client = app.test_client()
+    client.post("/admin/login", json={"code": "hello abhi"})
+    with app.app_context():
+        first_new_id = (db.session.query(db.func.max(Product.id)).scalar() or 0) + 1
+
+    results = {}
+    for label, body in (("insert", build_csv(args.rows)), ("update", build_csv(args.rows, first_new_id))):
+        started = time.perf_counter()
+        resp = client.post("/admin/products/import?format=csv", data=body, content_type="text/csv")
+        elapsed = time.perf_counter() - started
+        report = resp.get_json()
+        if not report.get("success") or report["failed"]:
+            print(json.dumps(report, indent=2)[:2000], file=sys.stderr)
+            sys.exit(1)
+        results[label] = dict(rows=args.rows, inserted=report["inserted"], updated=report["updated"],
+                              elapsed_s=round(elapsed, 3), rows_per_s=round(args.rows / elapsed))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Storefront load test: latency percentiles and throughput per endpoint.
+
+    python benchmarks/run.py --seed-products 1000 --seed-orders 100000
+    python benchmarks/run.py --server gunicorn --workers 4 --concurrency 32
+    python benchmarks/run.py --compare benchmarks/results/<earlier>.json
+
+Drives index, product search, order_form, create_order, track_order and the admin order
+dashboard either through Flask's test client (in-process) or through a
+local gunicorn started against the same database. Results are printed
+and saved as JSON under benchmarks/results/ so runs can be compared.
+"""
+import os, sys, json, time, random, socket, argparse, tempfile, logging, subprocess, threading
+import urllib.request, urllib.parse, http.cookiejar
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+ADMIN_CODE = "hello abhi"
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies, errors, elapsed):
+    def ms(v):
+        return round(v * 1000, 2) if v is not None else None
+
+    values = sorted(latencies)
+    return dict(
+        requests=len(values) + errors,
+        errors=errors,
+        requests_per_s=round((len(values) + errors) / elapsed, 1) if elapsed else None,
+        mean_ms=ms(sum(values) / len(values)) if values else None,
+        p50_ms=ms(percentile(values, 50)),
+        p95_ms=ms(percentile(values, 95)),
+        p99_ms=ms(percentile(values, 99)),
+        max_ms=ms(values[-1]) if values else None,
+    )
+
+
+# ----------  Clients ----------
+class TestClientDriver:
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def client(self, admin):
+        key = "admin" if admin else "anon"
+        client = getattr(self._local, key, None)
+        if client is None:
+            client = self.app.test_client()
+            if admin:
+                client.post("/admin/login", json={"code": ADMIN_CODE})
+            setattr(self._local, key, client)
+        return client
+
+    def request(self, method, path, body=None, admin=False):
+        resp = self.client(admin).open(path, method=method, json=body)
+        resp.close()
+        return resp.status_code
+
+
+class HTTPDriver:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self._local = threading.local()
+
+    def opener(self, admin):
+        key = "admin" if admin else "anon"
+        opener = getattr(self._local, key, None)
+        if opener is None:
+            opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+            if admin:
+                self._send(opener, "POST", "/admin/login", {"code": ADMIN_CODE})
+            setattr(self._local, key, opener)
+        return opener
+
+    def _send(self, opener, method, path, body):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"} if data else {})
+        try:
+            with opener.open(req, timeout=30) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def request(self, method, path, body=None, admin=False):
+        return self._send(self.opener(admin), method, path, body)
+
+
+# ----------  Workload ----------
+SEARCH_TERMS = ["cookware", "synthetic", "steel", "kadhai", "item", "product 12"]
+
+
+def scenarios(product_ids, phones, rng):
+    """name -> callable(driver) returning an HTTP status."""
+    def order_payload():
+        return dict(product_id=rng.choice(product_ids), quantity=1, customer_name="Load Test",
+                    customer_phone=rng.choice(phones), payment_method="cod")
+
+    return {
+        "index": lambda d: d.request("GET", "/"),
+        "search": lambda d: d.request("GET", f"/products/search?q={urllib.parse.quote(rng.choice(SEARCH_TERMS))}&in_stock=1"),
+        "order_form": lambda d: d.request("GET", f"/order-form/{rng.choice(product_ids)}"),
+        "create_order": lambda d: d.request("POST", "/order/create", order_payload()),
+        "track_order": lambda d: d.request("POST", "/track-order", {"phone": rng.choice(phones)}),
+        "admin_orders": lambda d: d.request("GET", "/admin/orders", admin=True),
+        "admin_orders_api": lambda d: d.request("GET", "/admin/orders/api", admin=True),
+    }
+
+
+def run_scenario(driver, call, requests, concurrency):
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            ok = call(driver) < 400
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+# ----------  gunicorn ----------
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers, threads, worker_class, env):
+    port = free_port()
+    cmd = ["gunicorn", "--config", "gunicorn.conf.py", "--worker-class", worker_class,
+           "--workers", str(workers), "--threads", str(threads),
+           "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "app:app"]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc, f"http://127.0.0.1:{port}"
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("gunicorn exited during startup")
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not start within 30s")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["endpoints"]
+    print(f"\nvs {baseline_path}")
+    for name, now in current.items():
+        before = baseline.get(name)
+        if not before or not before.get("p95_ms") or not now.get("p95_ms"):
+            continue
+        delta = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        print(f"  {name:18} p95 {before['p95_ms']:>8} -> {now['p95_ms']:>8} ms ({delta:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=["client", "gunicorn"], default="client")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--worker-class", default="gthread", help="gunicorn worker class (sync, gthread, gevent)")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--endpoints", help="comma-separated subset of endpoints to run")
+    parser.add_argument("--seed-products", type=int, default=1000)
+    parser.add_argument("--seed-orders", type=int, default=100000)
+    parser.add_argument("--no-seed", action="store_true", help="use DATABASE_URL as it is")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare p95 against")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    from app import app, init_db
+    from models import db, Product
+    from benchmarks.seed import seed, customer_phone
+    logging.getLogger().setLevel(logging.WARNING)
+    init_db()
+
+    if not args.no_seed:
+        started = time.perf_counter()
+        seed(app, args.seed_products, args.seed_orders)
+        print(f"Seeded {args.seed_products} products / {args.seed_orders} orders "
+              f"in {time.perf_counter() - started:.1f}s")
+
+    with app.app_context():
+        product_ids = [pid for (pid,) in db.session.execute(db.select(Product.id).where(Product.stock > 0))]
+    phones = [customer_phone(i) for i in range(max(1, args.seed_orders // 10))]
+
+    proc = None
+    if args.server == "gunicorn":
+        proc, base_url = start_gunicorn(args.workers, args.threads, args.worker_class, dict(os.environ))
+        driver = HTTPDriver(base_url)
+    else:
+        driver = TestClientDriver(app)
+
+    rng = random.Random(7)
+    selected = scenarios(product_ids, phones, rng)
+    if args.endpoints:
+        selected = {k: v for k, v in selected.items() if k in args.endpoints.split(",")}
+
+    results = {}
+    try:
+        for name, call in selected.items():
+            # Warm caches/connection pools so the first requests don't skew p99
+            for _ in range(min(20, args.requests)):
+                call(driver)
+            results[name] = run_scenario(driver, call, args.requests, args.concurrency)
+            r = results[name]
+            print(f"{name:18} {r['requests_per_s']:>8} req/s  p50 {r['p50_ms']:>8} ms  "
+                  f"p95 {r['p95_ms']:>8} ms  p99 {r['p99_ms']:>8} ms  errors {r['errors']}")
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report = dict(
+        meta=dict(
+            timestamp=datetime.now().isoformat(timespec="seconds"),
+            git_revision=git_revision(),
+            server=args.server,
+            workers=args.workers if proc else None,
+            threads=args.threads if proc else None,
+            worker_class=args.worker_class if proc else None,
+            concurrency=args.concurrency,
+            requests_per_endpoint=args.requests,
+            database=app.config["SQLALCHEMY_DATABASE_URI"].split("://")[0],
+            seed_products=None if args.no_seed else args.seed_products,
+            seed_orders=None if args.no_seed else args.seed_orders,
+        ),
+        endpoints=results,
+    )
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{args.server}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Seed a synthetic catalog and order history for benchmarking.
+
+    python benchmarks/seed.py --products 1000 --orders 1000000
+
+Uses DATABASE_URL like the app does (SQLite or Postgres). Rows are
+written with Core executemany in chunks, so a million orders take well
+under a minute on SQLite.
+"""
+import os, sys, random, argparse, logging
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STATUSES = ["pending", "processing", "shipped", "delivered", "cancelled"]
+PAYMENT_METHODS = ["cod", "upi", "bank_transfer"]
+PAYMENT_STATUSES = ["pending", "paid", "failed"]
+
+
+def customer_phone(n):
+    return f"9{n:09d}"
+
+
+def seed(app, products=1000, orders=100000, customers=None, days=365, chunk=10000, rng_seed=42):
+    """Insert ``products`` products and ``orders`` orders; returns the product ids."""
+    import analytics
+    from models import db, Product, Order, normalize_phone
+
+    rng = random.Random(rng_seed)
+    customers = customers or max(1, orders // 10)
+    now = datetime.now()
+
+    with app.app_context():
+        product_rows = [
+            dict(name=f"Synthetic product {i}", description=f"Benchmark cookware item number {i}",
+                 price=rng.randint(99, 4999), image=f"https://example.com/img/{i}.jpg", stock=10 ** 9)
+            for i in range(products)
+        ]
+        for start in range(0, len(product_rows), chunk):
+            db.session.execute(db.insert(Product), product_rows[start:start + chunk])
+        db.session.commit()
+        catalog = db.session.execute(db.select(Product.id, Product.name, Product.price)).all()
+
+        for start in range(0, orders, chunk):
+            batch = []
+            for _ in range(min(chunk, orders - start)):
+                product = rng.choice(catalog)
+                qty = rng.randint(1, 4)
+                phone = customer_phone(rng.randrange(customers))
+                created = now - timedelta(seconds=rng.randrange(days * 86400))
+                batch.append(dict(
+                    customer_name="Bench Customer", customer_phone=phone,
+                    customer_phone_normalized=normalize_phone(phone),
+                    product_id=product.id, product_name=product.name, quantity=qty,
+                    total_amount=product.price * qty, payment_method=rng.choice(PAYMENT_METHODS),
+                    payment_status=rng.choice(PAYMENT_STATUSES), order_status=rng.choice(STATUSES),
+                    created_at=created, updated_at=created,
+                ))
+            db.session.execute(db.insert(Order), batch)
+            db.session.commit()
+
+        # Bulk inserts bypass the incremental rollup updates
+        analytics.rebuild()
+        return [p.id for p in catalog]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--customers", type=int, help="distinct phone numbers (default: orders / 10)")
+    args = parser.parse_args()
+
+    from app import app, init_db
+    logging.getLogger().setLevel(logging.WARNING)
+    init_db()
+    seed(app, args.products, args.orders, args.customers)
+    print(f"Seeded {args.products} products and {args.orders} orders into {app.config['SQLALCHEMY_DATABASE_URI']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Order serialization: ORM ``to_dict()`` + stdlib JSON vs. serializers.py.
+
+    python benchmarks/serialization.py --orders 100000
+
+Seeds ``--orders`` orders, then serializes all of them to a JSON string
+both ways and reports fetch, dict-building and encoding time plus SQL
+statements per path. A second table shows the N+1 the lazy
+``Order.product`` relationship used to allow: ``--page`` orders with
+``order.product`` read per row, against the single joined select.
+"""
+import os, sys, time, json, argparse, tempfile, logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def orm_path(db, Order, dumps, counter):
+    db.session.expunge_all()
+    counter.count = 0
+    rows, fetch = timed(lambda: Order.query.order_by(Order.id).all())
+    dicts, build = timed(lambda: [o.to_dict() for o in rows])
+    body, encode = timed(lambda: dumps(dict(success=True, orders=dicts)))
+    return dict(fetch=fetch, build=build, encode=encode, statements=counter.count, bytes=len(body))
+
+
+def core_path(db, Order, serializers, dumps, counter):
+    db.session.expunge_all()
+    counter.count = 0
+    rows, fetch = timed(lambda: db.session.execute(serializers.order_select(Order).order_by(Order.id)).all())
+    dicts, build = timed(lambda: [serializers.order_dict(r) for r in rows])
+    body, encode = timed(lambda: dumps(dict(success=True, orders=dicts)))
+    return dict(fetch=fetch, build=build, encode=encode, statements=counter.count, bytes=len(body))
+
+
+def n_plus_one(db, Order, serializers, page, counter):
+    from sqlalchemy.orm import lazyload
+
+    db.session.expunge_all()
+    counter.count = 0
+    started = time.perf_counter()
+    # The pre-serializers behaviour: a lazy product load per order
+    for order in Order.query.options(lazyload(Order.product)).order_by(Order.id).limit(page):
+        data = order.to_dict()
+        data["product_image"] = order.product.image
+    lazy = dict(seconds=time.perf_counter() - started, statements=counter.count)
+
+    db.session.expunge_all()
+    counter.count = 0
+    started = time.perf_counter()
+    [serializers.order_dict(r) for r in db.session.execute(serializers.order_select(Order).order_by(Order.id).limit(page))]
+    joined = dict(seconds=time.perf_counter() - started, statements=counter.count)
+    return lazy, joined
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--page", type=int, default=1000, help="orders in the N+1 comparison")
+    parser.add_argument("--no-seed", action="store_true", help="use DATABASE_URL as it is")
+    args = parser.parse_args()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/serialization_bench.db")
+
+    from app import app, init_db
+    from models import db, Order
+    from benchmarks.seed import seed
+    import serializers
+    logging.getLogger().setLevel(logging.WARNING)
+    init_db()
+    if not args.no_seed:
+        seed(app, args.products, args.orders)
+
+    with app.app_context():
+        def stdlib(obj):
+            return json.dumps(obj, sort_keys=True, separators=(",", ":"))
+
+        counter = StatementCounter(db.engine)
+        fast = app.json.dumps
+        orm_path(db, Order, stdlib, counter)        # warm-up
+        results = {
+            "to_dict + json": orm_path(db, Order, stdlib, counter),
+            "serializers + orjson": core_path(db, Order, serializers, fast, counter),
+        }
+        lazy, joined = n_plus_one(db, Order, serializers, args.page, counter)
+
+    print(f"{args.orders if not args.no_seed else 'existing'} orders, "
+          f"{app.config['SQLALCHEMY_DATABASE_URI'].split('://')[0]}")
+    print(f"{'path':<22}{'fetch s':>9}{'build s':>9}{'encode s':>10}{'total s':>9}{'SQL':>6}{'MB':>7}")
+    for name, r in results.items():
+        total = r["fetch"] + r["build"] + r["encode"]
+        print(f"{name:<22}{r['fetch']:>9.3f}{r['build']:>9.3f}{r['encode']:>10.3f}{total:>9.3f}"
+              f"{r['statements']:>6}{r['bytes'] / 1e6:>7.1f}")
+    print(f"\nproduct data for {args.page} orders")
+    print(f"  lazy order.product   {lazy['seconds'] * 1000:>8.1f} ms  {lazy['statements']:>5} SQL")
+    print(f"  joined select        {joined['seconds'] * 1000:>8.1f} ms  {joined['statements']:>5} SQL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Session-store cost of storefront pages, with and without session scoping.
+
+    python benchmarks/session_overhead.py --requests 500
+    REDIS_URL=redis://localhost:6379/0 python benchmarks/session_overhead.py
+
+Requests the anonymous pages (index, order_form, payment_confirmation,
+product search) as two kinds of visitor, a shopper with no cookie and an
+admin browsing the storefront, once through the stock Flask-Session
+interface and once through ScopedSessionInterface. Reports p50/p95
+latency and session-store operations (Redis commands, or filesystem
+cache calls without REDIS_URL) per request and per second.
+"""
+import os, sys, time, argparse, tempfile, logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run import percentile
+
+ADMIN_CODE = "hello abhi"
+STORE_METHODS = {"get", "set", "setex", "delete", "expire", "exists", "add", "has"}
+
+
+class CountingStore:
+    """Forwards to the session store and counts the calls that hit it."""
+
+    def __init__(self, store):
+        self._store = store
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._store, name)
+        if name not in STORE_METHODS or not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+def attach_counter(interface):
+    attr = "redis" if hasattr(interface, "redis") else "cache"
+    counter = CountingStore(getattr(interface, attr))
+    setattr(interface, attr, counter)
+    return counter
+
+
+def measure(app, counter, paths, admin, requests):
+    client = app.test_client()
+    if admin:
+        client.post("/admin/login", json={"code": ADMIN_CODE})
+    counter.calls = 0
+
+    latencies = []
+    for i in range(requests):
+        started = time.perf_counter()
+        status = client.get(paths[i % len(paths)]).status_code
+        latencies.append(time.perf_counter() - started)
+        assert status < 400, status
+    elapsed = sum(latencies)
+    latencies.sort()
+    return dict(p50_ms=percentile(latencies, 50) * 1000, p95_ms=percentile(latencies, 95) * 1000,
+                store_ops_per_request=counter.calls / requests, store_ops_per_second=counter.calls / elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="requests per visitor and mode")
+    args = parser.parse_args()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/session_bench.db")
+
+    from app import app, init_db
+    logging.getLogger().setLevel(logging.WARNING)
+    init_db()
+
+    scoped = app.session_interface
+    stock = scoped.backend
+    counter = attach_counter(stock)
+
+    paths = ["/", "/order-form/1", "/payment-confirmation", "/products/search?q=steel"]
+    results = {}
+    for mode, interface in (("flask-session", stock), ("scoped", scoped)):
+        app.session_interface = interface
+        for visitor, admin in (("no cookie", False), ("admin cookie", True)):
+            results[(mode, visitor)] = measure(app, counter, paths, admin, args.requests)
+    app.session_interface = scoped
+
+    backend = "redis" if os.getenv("REDIS_URL") else "filesystem"
+    print(f"Session store: {backend}, {args.requests} requests per row")
+    print(f"{'interface':<15}{'visitor':<15}{'p50 ms':>9}{'p95 ms':>9}{'store ops/req':>15}{'store ops/s':>13}")
+    for (mode, visitor), r in results.items():
+        print(f"{mode:<15}{visitor:<15}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+              f"{r['store_ops_per_request']:>15.2f}{r['store_ops_per_second']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
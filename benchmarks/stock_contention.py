@@ -0,0 +1,92 @@
+"""Concurrency stress test for stock reservation on /order/create.
+
+Seeds a product with a small stock, fires N parallel orders at it and
+checks that the product was never oversold.
+
+    python benchmarks/stock_contention.py --requests 200 --concurrency 16 --stock 25
+    python benchmarks/stock_contention.py --url http://127.0.0.1:8000   # against gunicorn
+
+The target database comes from DATABASE_URL (a temporary SQLite file by
+default); when --url is given the server must use the same database.
+"""
+import os, sys, json, time, argparse, tempfile, logging, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--stock", type=int, default=25)
+    parser.add_argument("--url", help="base URL of a running server (default: in-process test client)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/stock_bench.db")
+
+    from app import app, init_db
+    from models import db, Product, Order
+    logging.getLogger().setLevel(logging.WARNING)
+    init_db()
+
+    with app.app_context():
+        product = Product(name="Contended Kadhai", description="Benchmark product",
+                          price=100, image="https://example.com/p.jpg", stock=args.stock)
+        db.session.add(product)
+        db.session.commit()
+        product_id = product.id
+
+    payload = dict(product_id=product_id, customer_name="Bench", customer_phone="9000000000",
+                   payment_method="cod", quantity=1)
+
+    if args.url:
+        def place(_):
+            req = urllib.request.Request(
+                f"{args.url.rstrip('/')}/order/create", data=json.dumps(payload).encode(),
+                headers={"Content-Type": "application/json"}, method="POST")
+            try:
+                with urllib.request.urlopen(req) as resp:
+                    return resp.status
+            except urllib.error.HTTPError as e:
+                return e.code
+    else:
+        def place(_):
+            return app.test_client().post("/order/create", json=payload).status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        statuses = list(pool.map(place, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        final_stock = db.session.get(Product, product_id).stock
+        sold = db.session.query(db.func.coalesce(db.func.sum(Order.quantity), 0)) \
+            .filter(Order.product_id == product_id).scalar()
+
+    ok = statuses.count(200)
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "initial_stock": args.stock,
+        "orders_created": ok,
+        "sold_out_responses": statuses.count(409),
+        "other_failures": len(statuses) - ok - statuses.count(409),
+        "final_stock": final_stock,
+        "units_sold": sold,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(args.requests / elapsed, 1),
+    }
+    print(json.dumps(report, indent=2))
+
+    oversold = final_stock < 0 or sold != args.stock - final_stock or ok != sold
+    if oversold:
+        print("FAIL: stock accounting is inconsistent (oversell)", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
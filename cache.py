@@ -0,0 +1,173 @@
+import os, json, time, hashlib, logging, threading
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    """A cached value plus the validators used for HTTP conditional requests."""
+
+    def __init__(self, value, version, built_at):
+        self.value = value
+        self.version = version
+        self.built_at = built_at
+        self.etag = hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()[:20]
+        self.fetched_at = time.monotonic()
+        # Per-process memo for things derived from ``value`` (e.g. rendered HTML)
+        self.derived = {}
+
+
+class VersionedCache:
+    """Two-tier cache invalidated by bumping a shared version number.
+
+    The in-process tier answers most reads. When a Redis client is
+    attached the version counter and the serialized value live in Redis,
+    so a bump in one worker invalidates every worker and a rebuild in one
+    worker is reused by the others. Without Redis the version is local to
+    the process and ``ttl`` bounds how stale other workers can get.
+    """
+
+    def __init__(self, namespace, ttl=60):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.redis = None
+        self._local_version = 0
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def init_redis(self, client):
+        self.redis = client
+
+    @property
+    def _version_key(self):
+        return f"{self.namespace}:version"
+
+    def _data_key(self, version):
+        return f"{self.namespace}:data:{version}"
+
+    def current_version(self):
+        if self.redis is not None:
+            try:
+                return int(self.redis.get(self._version_key) or 0)
+            except Exception as e:
+                logger.warning(f"{self.namespace}: Redis version lookup failed: {e}")
+        return self._local_version
+
+    def bump(self):
+        """Invalidate the cache in this process and, through Redis, everywhere."""
+        with self._lock:
+            self._local_version += 1
+            self._entry = None
+        if self.redis is not None:
+            try:
+                self.redis.incr(self._version_key)
+            except Exception as e:
+                logger.warning(f"{self.namespace}: Redis version bump failed: {e}")
+
+    def get(self, build):
+        """Return a fresh ``CacheEntry``, calling ``build()`` only on a miss."""
+        version = self.current_version()
+        entry = self._entry
+        if entry and entry.version == version and time.monotonic() - entry.fetched_at < self.ttl:
+            return entry
+
+        with self._lock:
+            entry = self._entry
+            if entry and entry.version == version and time.monotonic() - entry.fetched_at < self.ttl:
+                return entry
+            entry = self._load_shared(version) or self._build(build, version)
+            self._entry = entry
+            return entry
+
+    def _load_shared(self, version):
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(self._data_key(version))
+        except Exception as e:
+            logger.warning(f"{self.namespace}: Redis read failed: {e}")
+            return None
+        if not raw:
+            return None
+        payload = json.loads(raw)
+        return CacheEntry(payload["value"], version, payload["built_at"])
+
+    def _build(self, build, version):
+        entry = CacheEntry(build(), version, time.time())
+        if self.redis is not None:
+            try:
+                self.redis.set(
+                    self._data_key(version),
+                    json.dumps({"value": entry.value, "built_at": entry.built_at}),
+                    ex=self.ttl,
+                )
+            except Exception as e:
+                logger.warning(f"{self.namespace}: Redis write failed: {e}")
+        return entry
+
+
+class TTLCache:
+    """Short-lived per-key cache: Redis when attached, else a bounded local dict.
+
+    Values must be JSON-serializable. Writers call ``delete()`` for the
+    keys they affect; ``ttl`` only caps staleness for anything missed.
+    """
+
+    def __init__(self, namespace, ttl=30, max_local_entries=10000):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_local_entries = max_local_entries
+        self.redis = None
+        self._local = {}
+        self._lock = threading.Lock()
+
+    def init_redis(self, client):
+        self.redis = client
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def get(self, key):
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(self._key(key))
+                return json.loads(raw) if raw else None
+            except Exception as e:
+                logger.warning(f"{self.namespace}: Redis read failed: {e}")
+                return None
+        hit = self._local.get(key)
+        if hit and hit[0] > time.monotonic():
+            return hit[1]
+        return None
+
+    def set(self, key, value):
+        if self.redis is not None:
+            try:
+                self.redis.set(self._key(key), json.dumps(value), ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"{self.namespace}: Redis write failed: {e}")
+            return
+        with self._lock:
+            if len(self._local) >= self.max_local_entries:
+                now = time.monotonic()
+                self._local = {k: v for k, v in self._local.items() if v[0] > now}
+                if len(self._local) >= self.max_local_entries:
+                    self._local.clear()
+            self._local[key] = (time.monotonic() + self.ttl, value)
+
+    def delete(self, *keys):
+        if self.redis is not None:
+            try:
+                self.redis.delete(*(self._key(k) for k in keys))
+            except Exception as e:
+                logger.warning(f"{self.namespace}: Redis delete failed: {e}")
+            return
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "60"))
+TRACKING_CACHE_TTL = int(os.getenv("TRACKING_CACHE_TTL", "30"))
+
+catalog_cache = VersionedCache("catalog", ttl=CATALOG_CACHE_TTL)
+tracking_cache = TTLCache("track", ttl=TRACKING_CACHE_TTL)
@@ -0,0 +1,165 @@
+import io, csv, json, logging
+from itertools import islice
+
+from models import db, Product
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_IMG = "https://via.placeholder.com/400x300/6c757d/ffffff?text=Cookware+Item"
+DEFAULT_DESCRIPTION = "Premium cookware item"
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+class RowError(ValueError):
+    pass
+
+
+def _field(raw, name):
+    """Stripped text of ``raw[name]``; None when the column is missing or blank."""
+    value = raw.get(name)
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def clean_row(raw):
+    """Validate one submitted product and return a ``Product`` mapping.
+
+    Rows with an ``id`` update that product, and only the columns they
+    carry (a missing column or blank cell keeps the current value). Rows
+    without one are inserted; missing optional columns get defaults.
+    """
+    if isinstance(raw, RowError):
+        raise raw
+    if not isinstance(raw, dict):
+        raise RowError("Row must be an object")
+
+    row = {}
+    name = _field(raw, "name")
+    if name is not None:
+        if len(name) > 120:
+            raise RowError("Name is longer than 120 characters")
+        row["name"] = name
+
+    for field in ("price", "stock"):
+        value = _field(raw, field)
+        if value is not None:
+            try:
+                row[field] = int(value)
+            except ValueError:
+                raise RowError("Price and stock must be whole numbers")
+    if row.get("price", 1) <= 0:
+        raise RowError("Price must be positive")
+    if row.get("stock", 0) < 0:
+        raise RowError("Stock cannot be negative")
+
+    description = _field(raw, "description")
+    if description is not None:
+        row["description"] = description
+    image = _field(raw, "image")
+    if image is not None:
+        if len(image) > 500:
+            raise RowError("Image URL is longer than 500 characters")
+        row["image"] = image
+
+    product_id = _field(raw, "id")
+    if product_id is not None:
+        if not product_id.isdigit():
+            raise RowError(f"Invalid id: {product_id}")
+        if not row:
+            raise RowError("Nothing to update")
+        row["id"] = int(product_id)
+        return row
+
+    if "name" not in row:
+        raise RowError("Missing name")
+    if "price" not in row:
+        raise RowError("Missing price")
+    row.setdefault("description", DEFAULT_DESCRIPTION)
+    row.setdefault("stock", 0)
+    row.setdefault("image", PLACEHOLDER_IMG)
+    return row
+
+
+def bulk_upsert(rows, chunk_size=CHUNK_SIZE):
+    """Insert/update products from an iterable of dicts in chunked transactions.
+
+    Each chunk costs one ``SELECT id ... WHERE id IN (...)``, one bulk
+    INSERT, one bulk UPDATE and one commit. Invalid rows are skipped and
+    reported by their 1-based position in the input.
+    """
+    report = dict(inserted=0, updated=0, failed=0, errors=[])
+
+    def fail(row_no, message):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append(dict(row=row_no, message=message))
+
+    numbered = enumerate(rows, start=1)
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            break
+
+        valid = []
+        for row_no, raw in chunk:
+            try:
+                valid.append((row_no, clean_row(raw)))
+            except RowError as e:
+                fail(row_no, str(e))
+
+        ids = {row["id"] for _, row in valid if "id" in row}
+        existing = set()
+        if ids:
+            existing = {pid for (pid,) in db.session.query(Product.id).filter(Product.id.in_(ids))}
+
+        inserts, updates = [], []
+        for row_no, row in valid:
+            if "id" not in row:
+                inserts.append((row_no, row))
+            elif row["id"] in existing:
+                updates.append((row_no, row))
+            else:
+                fail(row_no, f"Product {row['id']} not found")
+
+        try:
+            if inserts:
+                db.session.bulk_insert_mappings(Product, [row for _, row in inserts])
+            if updates:
+                db.session.bulk_update_mappings(Product, [row for _, row in updates])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Product import chunk starting at row {chunk[0][0]} failed: {e}")
+            for row_no, _ in inserts + updates:
+                fail(row_no, "Database error")
+            continue
+
+        report["inserted"] += len(inserts)
+        report["updated"] += len(updates)
+
+    report["errors"].sort(key=lambda err: err["row"])
+    return report
+
+
+def iter_csv(stream):
+    """Yield product dicts from a binary CSV stream with a header row."""
+    yield from csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+
+
+def iter_jsonl(stream):
+    """Yield product dicts from a binary JSON-lines stream; blank lines are skipped."""
+    for line in io.TextIOWrapper(stream, encoding="utf-8"):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            # Reported against this row by bulk_upsert()
+            yield RowError("Invalid JSON")
+
+
+READERS = {"csv": iter_csv, "jsonl": iter_jsonl, "ndjson": iter_jsonl}
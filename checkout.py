@@ -0,0 +1,130 @@
+from sqlalchemy import select, exists
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Product, Order, OrderItem, OrderArchive
+from tasks import emit_order_created
+from inventory import reserve_lines, available_stock, run_with_retries, StockBusy, InsufficientStock
+
+MAX_CART_LINES = 50
+CUSTOMER_FIELDS = ["customer_name", "customer_phone", "payment_method"]
+
+
+class CheckoutError(Exception):
+    """A checkout that cannot go through; carries the HTTP status to answer with."""
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.extra = extra
+
+
+def customer_fields(data):
+    """Validate and normalize the customer part of a checkout payload."""
+    for field in CUSTOMER_FIELDS:
+        if not data.get(field):
+            raise CheckoutError(f"Missing required field: {field}")
+    return dict(
+        customer_name=data["customer_name"].strip(),
+        customer_phone=data["customer_phone"].strip(),
+        customer_email=data.get("customer_email", "").strip() or None,
+        payment_method=data["payment_method"].strip(),
+        customer_address=data.get("customer_address", "").strip() or None,
+        notes=data.get("notes", "").strip() or None,
+        upi_transaction_id=data.get("upi_transaction_id", "").strip() or None,
+    )
+
+
+def parse_lines(raw_items):
+    """Turn ``[{product_id, quantity}, ...]`` into ``{product_id: qty}``.
+
+    Repeated products are merged into one line.
+    """
+    if not isinstance(raw_items, list) or not raw_items:
+        raise CheckoutError("Cart is empty")
+    if len(raw_items) > MAX_CART_LINES:
+        raise CheckoutError(f"Cart cannot have more than {MAX_CART_LINES} lines")
+
+    quantities = {}
+    for item in raw_items:
+        try:
+            product_id = int(item["product_id"])
+            qty = int(item.get("quantity", 1))
+        except (KeyError, ValueError, TypeError, AttributeError):
+            raise CheckoutError("Invalid cart line")
+        if qty <= 0:
+            raise CheckoutError("Quantity must be positive")
+        quantities[product_id] = quantities.get(product_id, 0) + qty
+    return quantities
+
+
+def upi_transaction_used(upi_transaction_id):
+    """True if an order, live or archived, already carries this UPI payment."""
+    return db.session.execute(select(
+        exists().where(Order.upi_transaction_id == upi_transaction_id)
+        | exists().where(OrderArchive.upi_transaction_id == upi_transaction_id)
+    )).scalar()
+
+
+def place_order(fields, quantities, created_at):
+    """Create one order for every line in ``quantities`` in a single transaction.
+
+    Products are fetched with one ``IN`` query, all stock is reserved
+    before the single commit, and a failure on any line rolls back the
+    whole cart. ``Order.product_id``/``product_name``/``quantity`` are
+    filled in from the first line and the totals so single-product views
+    keep working.
+    """
+    products = {p.id: p for p in Product.query.filter(Product.id.in_(quantities)).all()}
+    for product_id in quantities:
+        if product_id not in products:
+            raise CheckoutError("Product not found", 404, product_id=product_id)
+
+    upi = fields.get("upi_transaction_id")
+    if upi and upi_transaction_used(upi):
+        raise CheckoutError("This UPI transaction ID has already been used", 409)
+
+    first = products[next(iter(quantities))]
+    summary = first.name if len(quantities) == 1 else f"{first.name} + {len(quantities) - 1} more"
+    total = sum(products[pid].price * qty for pid, qty in quantities.items())
+
+    def unit_of_work():
+        reserve_lines(quantities)
+        order = Order(
+            **fields,
+            product_id=first.id,
+            product_name=summary[:120],
+            product_image=first.image,
+            quantity=sum(quantities.values()),
+            total_amount=total,
+            created_at=created_at,
+            items=[
+                OrderItem(product_id=pid, product_name=products[pid].name, unit_price=products[pid].price,
+                          quantity=qty, line_total=products[pid].price * qty)
+                for pid, qty in quantities.items()
+            ],
+        )
+        db.session.add(order)
+        db.session.flush()                          # assigns order.id for the event
+        emit_order_created(order)
+        db.session.commit()
+        return order
+
+    try:
+        return run_with_retries(unit_of_work)
+    except IntegrityError:
+        # Lost a race on uq_orders_upi_transaction_id
+        db.session.rollback()
+        if upi and upi_transaction_used(upi):
+            raise CheckoutError("This UPI transaction ID has already been used", 409)
+        raise
+    except StockBusy:
+        raise CheckoutError("Product is busy, please try again", 503)
+    except InsufficientStock as e:
+        db.session.rollback()
+        name = products[e.product_id].name
+        available = available_stock(e.product_id)
+        if available <= 0:
+            raise CheckoutError(f"{name} is sold out", 409, sold_out=True, product_id=e.product_id)
+        raise CheckoutError(f"Only {available} items of {name} available in stock", 400,
+                            product_id=e.product_id)
@@ -0,0 +1,88 @@
+"""Serving and database-pool settings, derived from the CPU count and environment.
+
+Read by ``gunicorn.conf.py`` (worker class, workers, threads) and by
+``app.py`` (SQLAlchemy engine options), so the connection pool is sized
+for the concurrency each worker actually runs with.
+
+    WEB_WORKER_CLASS      gthread (default) or gevent (needs the gevent package)
+    WEB_CONCURRENCY       worker processes (default: CPU count, at least 2)
+    WEB_THREADS           threads per gthread worker (default 4)
+    WEB_WORKER_CONNECTIONS  greenlets per gevent worker (default 100)
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+    DB_POOL_PRE_PING      1 to ping every checked-out connection (default off)
+"""
+import os
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def cpu_count():
+    """CPUs this process may run on (respects container/cgroup affinity)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:                  # macOS / Windows
+        return os.cpu_count() or 1
+
+
+def worker_class():
+    wanted = os.getenv("WEB_WORKER_CLASS", "gthread").lower()
+    if wanted == "gevent":
+        try:
+            import gevent  # noqa: F401
+        except ImportError:
+            return "gthread"
+        return "gevent"
+    return "gthread"
+
+
+def workers():
+    return _env_int("WEB_CONCURRENCY", max(2, cpu_count()))
+
+
+def threads():
+    return _env_int("WEB_THREADS", 4)
+
+
+def worker_connections():
+    return _env_int("WEB_WORKER_CONNECTIONS", 100)
+
+
+def request_concurrency():
+    """Requests one worker process can have in flight at once."""
+    if worker_class() == "gevent":
+        return worker_connections()
+    return threads()
+
+
+def engine_options(database_uri):
+    """``SQLALCHEMY_ENGINE_OPTIONS`` for ``database_uri``.
+
+    Server databases get a pool sized to one connection per request thread
+    plus one for the in-process job worker, and LIFO checkout so surplus
+    connections go idle and get recycled. ``pool_pre_ping`` is off by
+    default: it costs a round trip per checkout, and ``pool_recycle``
+    already retires connections before the server's idle timeout. A
+    connection the server dropped anyway fails once and the pool is
+    invalidated and reconnects.
+    """
+    pre_ping = os.getenv("DB_POOL_PRE_PING", "0") == "1"
+    if database_uri.startswith("sqlite"):
+        # File-backed SQLite connections are cheap and never go stale
+        return dict(pool_pre_ping=pre_ping)
+
+    # gevent workers multiplex many requests; cap the pool, let them queue on it
+    default_size = min(request_concurrency(), 20) + 1
+    options = dict(
+        pool_size=_env_int("DB_POOL_SIZE", default_size),
+        max_overflow=_env_int("DB_MAX_OVERFLOW", 5),
+        pool_timeout=_env_int("DB_POOL_TIMEOUT", 10),
+        pool_recycle=_env_int("DB_POOL_RECYCLE", 300),
+        pool_pre_ping=pre_ping,
+        pool_use_lifo=True,
+    )
+    if database_uri.startswith("postgres"):
+        options["connect_args"] = dict(connect_timeout=_env_int("DB_CONNECT_TIMEOUT", 5))
+    return options
@@ -0,0 +1,23 @@
+"""gunicorn settings; values come from config.py so the DB pool matches them.
+
+Run ``flask --app app init-db`` once per deploy (the Procfile ``release``
+entry) before starting workers: app import no longer creates tables.
+"""
+import os
+
+import config as serving      # "config" itself is a gunicorn setting name
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = serving.worker_class()
+workers = serving.workers()
+threads = serving.threads()
+worker_connections = serving.worker_connections()
+
+timeout = int(os.getenv("WEB_TIMEOUT", "30"))
+graceful_timeout = 20
+keepalive = 5
+# Recycle workers now and then to bound slow memory growth
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = "-" if os.getenv("WEB_ACCESS_LOG") == "1" else None
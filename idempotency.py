@@ -0,0 +1,180 @@
+"""``Idempotency-Key`` support for the checkout endpoints.
+
+A client that may retry a POST (network retry, double click) sends the
+same ``Idempotency-Key`` header on every attempt. The first request with
+a key claims it and runs; its response is stored for ``IDEMPOTENCY_TTL``
+and later requests with that key get the stored response back, marked
+``Idempotent-Replayed: true``, without opening a transaction. A request
+that arrives while the first is still running waits up to
+``COALESCE_WAIT_SECONDS`` for its result instead of running alongside it.
+
+Records live in Redis (``SET NX`` claim, TTL on the key) when a client is
+attached, otherwise in the ``idempotency_keys`` table. 5xx responses are
+not stored, so the key can be retried. Reusing a key with a different
+request body is rejected with 422.
+"""
+import os, json, time, hashlib, logging, functools
+from datetime import datetime, timedelta
+
+from flask import request, jsonify, make_response, current_app
+from sqlalchemy import select, update, delete, or_, and_
+from sqlalchemy.exc import IntegrityError
+
+from models import db, IdempotencyRecord
+import jobs
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+IDEMPOTENCY_TTL = timedelta(hours=int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")))
+# A claim older than this with no response is treated as abandoned (worker died)
+LOCK_SECONDS = 30
+COALESCE_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+POLL_INTERVAL = 0.1
+PURGE_INTERVAL_SECONDS = 3600
+
+_redis = None
+
+
+def init_redis(client):
+    global _redis
+    _redis = client
+
+
+# ----------  Stores ----------
+# claim() returns None when the caller now owns the key, otherwise the
+# existing record: {fingerprint, status, mimetype, body}, status None while pending.
+class RedisStore:
+    def __init__(self, client):
+        self.redis = client
+
+    def claim(self, key, fingerprint):
+        pending = json.dumps(dict(fingerprint=fingerprint, status=None))
+        while True:
+            if self.redis.set(key, pending, nx=True, ex=LOCK_SECONDS):
+                return None
+            raw = self.redis.get(key)
+            if raw is not None:             # else it expired in between; claim again
+                return json.loads(raw)
+
+    def complete(self, key, fingerprint, status, mimetype, body):
+        record = dict(fingerprint=fingerprint, status=status, mimetype=mimetype, body=body)
+        self.redis.set(key, json.dumps(record), ex=int(IDEMPOTENCY_TTL.total_seconds()))
+
+    def release(self, key):
+        self.redis.delete(key)
+
+
+class DatabaseStore:
+    def claim(self, key, fingerprint):
+        now = datetime.utcnow()
+        db.session.add(IdempotencyRecord(key=key, fingerprint=fingerprint, locked_at=now,
+                                         expires_at=now + IDEMPOTENCY_TTL))
+        try:
+            db.session.commit()
+            return None
+        except IntegrityError:
+            db.session.rollback()
+
+        # Expired and abandoned records can be taken over
+        taken = db.session.execute(
+            update(IdempotencyRecord)
+            .where(IdempotencyRecord.key == key,
+                   or_(IdempotencyRecord.expires_at < now,
+                       and_(IdempotencyRecord.status_code.is_(None),
+                            IdempotencyRecord.locked_at < now - timedelta(seconds=LOCK_SECONDS))))
+            .values(fingerprint=fingerprint, status_code=None, mimetype=None, body=None,
+                    locked_at=now, expires_at=now + IDEMPOTENCY_TTL)
+        ).rowcount
+        db.session.commit()
+        if taken:
+            return None
+
+        row = db.session.execute(
+            select(IdempotencyRecord.fingerprint, IdempotencyRecord.status_code,
+                   IdempotencyRecord.mimetype, IdempotencyRecord.body)
+            .where(IdempotencyRecord.key == key)
+        ).first()
+        if row is None:                     # released in between; claim again
+            return self.claim(key, fingerprint)
+        return dict(fingerprint=row.fingerprint, status=row.status_code, mimetype=row.mimetype, body=row.body)
+
+    def complete(self, key, fingerprint, status, mimetype, body):
+        db.session.execute(
+            update(IdempotencyRecord)
+            .where(IdempotencyRecord.key == key, IdempotencyRecord.fingerprint == fingerprint)
+            .values(status_code=status, mimetype=mimetype, body=body,
+                    expires_at=datetime.utcnow() + IDEMPOTENCY_TTL)
+        )
+        db.session.commit()
+
+    def release(self, key):
+        db.session.execute(delete(IdempotencyRecord).where(IdempotencyRecord.key == key))
+        db.session.commit()
+
+
+def store():
+    return RedisStore(_redis) if _redis is not None else DatabaseStore()
+
+
+# ----------  View decorator ----------
+def _replay(record):
+    response = current_app.response_class(record["body"], status=record["status"], mimetype=record["mimetype"])
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view):
+    """Honour ``Idempotency-Key`` on a POST view; requests without it run as before."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        raw_key = request.headers.get(HEADER)
+        if raw_key is None:
+            return view(*args, **kwargs)
+        raw_key = raw_key.strip()
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            return jsonify(success=False, message=f"Invalid {HEADER}"), 400
+
+        key = f"idempotency:{request.path}:{raw_key}"
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+        records = store()
+
+        deadline = time.monotonic() + COALESCE_WAIT_SECONDS
+        record = records.claim(key, fingerprint)
+        while record is not None:
+            if record["fingerprint"] != fingerprint:
+                return jsonify(success=False, message=f"{HEADER} was already used for a different request"), 422
+            if record["status"] is not None:
+                logger.info(f"Replaying stored response for {key}")
+                return _replay(record)
+            if time.monotonic() >= deadline:
+                return jsonify(success=False, message="A request with this key is still being processed"), 409
+            time.sleep(POLL_INTERVAL)
+            record = records.claim(key, fingerprint)
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            records.release(key)
+            raise
+        if response.status_code >= 500:
+            records.release(key)
+        else:
+            records.complete(key, fingerprint, response.status_code, response.mimetype,
+                             response.get_data(as_text=True))
+        return response
+    return wrapper
+
+
+@jobs.periodic(PURGE_INTERVAL_SECONDS)
+def purge_expired_keys():
+    """Drop expired DB records (Redis expires its own)."""
+    if _redis is not None:
+        return
+    deleted = db.session.execute(
+        delete(IdempotencyRecord).where(IdempotencyRecord.expires_at < datetime.utcnow())
+    ).rowcount
+    db.session.commit()
+    if deleted:
+        logger.info(f"Purged {deleted} expired idempotency keys")
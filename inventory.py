@@ -0,0 +1,117 @@
+import os, time, random, logging
+
+from sqlalchemy import update, select, case
+from sqlalchemy.exc import OperationalError, DBAPIError
+
+from models import db, Product
+
+logger = logging.getLogger(__name__)
+
+# "conditional": single UPDATE ... WHERE stock >= :qty (default, works everywhere)
+# "skip_locked": SELECT ... FOR UPDATE SKIP LOCKED, then UPDATE (Postgres)
+RESERVATION_MODE = os.getenv("STOCK_RESERVATION_MODE", "conditional")
+MAX_ATTEMPTS = int(os.getenv("STOCK_RESERVATION_ATTEMPTS", "4"))
+
+# Postgres SQLSTATEs worth retrying: serialization_failure, deadlock_detected, lock_not_available
+RETRYABLE_PGCODES = {"40001", "40P01", "55P03"}
+
+
+class StockBusy(Exception):
+    """The product row is locked by another checkout; safe to retry."""
+
+
+class InsufficientStock(Exception):
+    """A product in a multi-line reservation does not have enough units."""
+
+    def __init__(self, product_id):
+        super().__init__(product_id)
+        self.product_id = product_id
+
+
+def reserve_stock(product_id, qty, mode=None):
+    """Take ``qty`` units of a product inside the current transaction.
+
+    Returns True when the stock was reserved and False when the product is
+    sold out (or has fewer than ``qty`` units left). Nothing is committed;
+    a later rollback gives the units back.
+    """
+    mode = mode or RESERVATION_MODE
+    if mode == "skip_locked":
+        row = db.session.execute(
+            select(Product.stock)
+            .where(Product.id == product_id)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if row is None:
+            raise StockBusy(product_id)
+        if row.stock < qty:
+            return False
+
+    result = db.session.execute(
+        update(Product)
+        .where(Product.id == product_id, Product.stock >= qty)
+        .values(stock=Product.stock - qty)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def reserve_lines(quantities, mode=None):
+    """Reserve every ``{product_id: qty}`` line or raise InsufficientStock.
+
+    Rows are locked in ascending id order so two carts sharing products
+    cannot deadlock each other. The caller rolls back on failure.
+    """
+    for product_id in sorted(quantities):
+        if not reserve_stock(product_id, quantities[product_id], mode=mode):
+            raise InsufficientStock(product_id)
+
+
+def release_lines(quantities):
+    """Give back every ``{product_id: qty}`` line with one ``UPDATE ... CASE``."""
+    if not quantities:
+        return
+    db.session.execute(
+        update(Product)
+        .where(Product.id.in_(quantities))
+        .values(stock=Product.stock + case(quantities, value=Product.id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def available_stock(product_id):
+    return db.session.execute(
+        select(Product.stock).where(Product.id == product_id)
+    ).scalar() or 0
+
+
+def is_retryable(error):
+    if isinstance(error, StockBusy):
+        return True
+    if not isinstance(error, DBAPIError):
+        return False
+    pgcode = getattr(error.orig, "pgcode", None)
+    if pgcode in RETRYABLE_PGCODES:
+        return True
+    # SQLite reports writer contention as a plain OperationalError
+    return isinstance(error, OperationalError) and "locked" in str(error.orig).lower()
+
+
+def run_with_retries(unit_of_work, attempts=None):
+    """Run ``unit_of_work()`` and retry it on lock/serialization conflicts.
+
+    The session is rolled back before every retry, so ``unit_of_work``
+    must be safe to run again from scratch. Backoff is exponential with
+    jitter to spread out colliding workers.
+    """
+    attempts = attempts or MAX_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        try:
+            return unit_of_work()
+        except (StockBusy, DBAPIError) as e:
+            db.session.rollback()
+            if attempt == attempts or not is_retryable(e):
+                raise
+            delay = 0.01 * (2 ** attempt) * random.uniform(0.5, 1.5)
+            logger.info(f"Stock reservation conflict (attempt {attempt}), retrying in {delay:.3f}s")
+            time.sleep(delay)
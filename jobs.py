@@ -0,0 +1,285 @@
+"""Background job queue for work that should not hold up a request.
+
+Two backends share one interface:
+
+* ``redis`` (when a Redis client is attached): jobs are pushed to a list
+  after the enqueuing transaction commits; retries wait in a sorted set.
+* ``db`` (fallback): jobs are rows in ``background_jobs`` written in the
+  enqueuing transaction itself, so they exist exactly when the data that
+  produced them does. Without a dedicated worker a daemon thread in the
+  web process drains the table (set ``JOBS_IN_PROCESS=0`` to disable).
+
+Delivery is at-least-once. Handlers run in a transaction that also
+records the job key in ``job_receipts``, so a redelivered job is a no-op.
+Failed jobs are retried with exponential backoff up to ``MAX_ATTEMPTS``.
+
+Functions registered with ``@periodic(seconds)`` run from the same worker
+loop on a timer; they must be safe to run from several workers at once.
+Finished jobs and their receipts are purged after ``JOBS_RETENTION_DAYS``.
+"""
+import os, json, time, uuid, logging, threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select, update, delete, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session as SASession
+
+from models import db, BackgroundJob, JobReceipt
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+BACKOFF_SECONDS = float(os.getenv("JOBS_BACKOFF_SECONDS", "2"))
+POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "1"))
+STALE_LOCK = timedelta(minutes=10)
+# Finished jobs and receipts are kept this long; far beyond any redelivery window
+RETENTION = timedelta(days=int(os.getenv("JOBS_RETENTION_DAYS", "7")))
+PURGE_INTERVAL_SECONDS = 3600
+IN_PROCESS = os.getenv("JOBS_IN_PROCESS", "1") != "0"
+
+QUEUE_KEY = "jobs:queue"
+PROCESSING_KEY = "jobs:processing"
+DELAYED_KEY = "jobs:delayed"
+DEAD_KEY = "jobs:dead"
+
+_handlers = {}
+_periodic = {}
+_redis = None
+_app = None
+_inline_worker = None
+_inline_lock = threading.Lock()
+
+
+def handler(kind):
+    """Register ``fn(payload)`` for jobs of ``kind``; it must not commit."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def periodic(interval):
+    """Run ``fn()`` every ``interval`` seconds in the worker loop (0 disables it)."""
+    def register(fn):
+        if interval > 0:
+            _periodic[fn.__name__] = dict(fn=fn, interval=interval, due=0.0)
+        return fn
+    return register
+
+
+def init_app(app, redis_client=None):
+    global _redis, _app
+    _redis = redis_client
+    _app = app
+
+
+def backend():
+    return "redis" if _redis is not None else "db"
+
+
+def backoff(attempts):
+    return BACKOFF_SECONDS * (2 ** (attempts - 1))
+
+
+# ----------  Enqueue ----------
+def enqueue(kind, payload, key=None):
+    """Queue a job as part of the current transaction.
+
+    Nothing is delivered unless that transaction commits.
+    """
+    job = dict(kind=kind, key=key or f"{kind}:{uuid.uuid4().hex}", payload=payload, attempts=0)
+    if backend() == "redis":
+        db.session.info.setdefault("pending_jobs", []).append(job)
+    else:
+        db.session.add(BackgroundJob(kind=kind, key=job["key"], payload=json.dumps(payload)))
+        _ensure_inline_worker()
+
+
+@event.listens_for(SASession, "after_commit")
+def _publish_pending(session):
+    pending = session.info.pop("pending_jobs", None)
+    if not pending or _redis is None:
+        return
+    try:
+        _redis.lpush(QUEUE_KEY, *(json.dumps(job) for job in pending))
+    except Exception as e:
+        # The data is committed; the rollup/notification can be rebuilt
+        logger.error(f"Could not publish {len(pending)} job(s) to Redis: {e}")
+
+
+@event.listens_for(SASession, "after_rollback")
+def _drop_pending(session):
+    session.info.pop("pending_jobs", None)
+
+
+# ----------  Execution ----------
+def execute(kind, key, payload):
+    """Run one job's handler and record its receipt in a single transaction.
+
+    Returns False when the job had already been processed.
+    """
+    fn = _handlers.get(kind)
+    if fn is None:
+        raise LookupError(f"No handler for job kind {kind!r}")
+    db.session.add(JobReceipt(key=key))
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    fn(payload)
+    return True
+
+
+def _run_db_job(job):
+    try:
+        processed = execute(job.kind, job.key, json.loads(job.payload))
+        if processed is False:
+            db.session.execute(update(BackgroundJob).where(BackgroundJob.id == job.id).values(status="done"))
+        else:
+            job.status = "done"
+            job.locked_at = None
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        attempts = job.attempts
+        failed = attempts >= MAX_ATTEMPTS
+        db.session.execute(
+            update(BackgroundJob).where(BackgroundJob.id == job.id).values(
+                status="failed" if failed else "queued",
+                run_at=datetime.utcnow() + timedelta(seconds=backoff(attempts)),
+                locked_at=None,
+                last_error=str(e)[:2000],
+            )
+        )
+        db.session.commit()
+        log = logger.error if failed else logger.warning
+        log(f"Job {job.kind} {job.key} failed (attempt {attempts}/{MAX_ATTEMPTS}): {e}")
+
+
+def _claim_db_jobs(limit=20):
+    now = datetime.utcnow()
+    candidates = db.session.execute(
+        select(BackgroundJob.id)
+        .where(or_(
+            (BackgroundJob.status == "queued") & (BackgroundJob.run_at <= now),
+            (BackgroundJob.status == "running") & (BackgroundJob.locked_at < now - STALE_LOCK),
+        ))
+        .order_by(BackgroundJob.run_at)
+        .limit(limit)
+    ).scalars().all()
+
+    claimed = []
+    for job_id in candidates:
+        # Conditional update so two workers never run the same row
+        result = db.session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id,
+                   or_(BackgroundJob.status == "queued", BackgroundJob.locked_at < now - STALE_LOCK))
+            .values(status="running", locked_at=now, attempts=BackgroundJob.attempts + 1)
+        )
+        if result.rowcount == 1:
+            claimed.append(job_id)
+    db.session.commit()
+    return [db.session.get(BackgroundJob, job_id) for job_id in claimed]
+
+
+def _run_redis_job(raw):
+    job = json.loads(raw)
+    job["attempts"] += 1
+    try:
+        execute(job["kind"], job["key"], job["payload"])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if job["attempts"] >= MAX_ATTEMPTS:
+            _redis.lpush(DEAD_KEY, json.dumps(dict(job, error=str(e)[:2000])))
+            logger.error(f"Job {job['kind']} {job['key']} failed permanently: {e}")
+        else:
+            _redis.zadd(DELAYED_KEY, {json.dumps(job): time.time() + backoff(job["attempts"])})
+            logger.warning(f"Job {job['kind']} {job['key']} failed (attempt {job['attempts']}), retrying: {e}")
+    finally:
+        _redis.lrem(PROCESSING_KEY, 1, raw)
+
+
+def _promote_delayed():
+    for raw in _redis.zrangebyscore(DELAYED_KEY, 0, time.time(), start=0, num=100):
+        # zrem succeeds for exactly one worker
+        if _redis.zrem(DELAYED_KEY, raw):
+            _redis.lpush(QUEUE_KEY, raw)
+
+
+def _requeue_orphans():
+    """Give back jobs left in the processing list by a worker that died."""
+    while _redis.rpoplpush(PROCESSING_KEY, QUEUE_KEY):
+        pass
+
+
+def work_once(block_seconds=POLL_INTERVAL):
+    """Process whatever is due; returns the number of jobs handled."""
+    if backend() == "redis":
+        _promote_delayed()
+        raw = _redis.brpoplpush(QUEUE_KEY, PROCESSING_KEY, timeout=max(1, int(block_seconds)))
+        if raw is None:
+            return 0
+        _run_redis_job(raw)
+        return 1
+
+    jobs = _claim_db_jobs()
+    for job in jobs:
+        _run_db_job(job)
+    return len(jobs)
+
+
+def _run_periodic():
+    now = time.monotonic()
+    for name, task in _periodic.items():
+        if now < task["due"]:
+            continue
+        task["due"] = now + task["interval"]
+        try:
+            task["fn"]()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Periodic task {name} failed: {e}")
+
+
+def run_worker(app, stop_event=None):
+    """Worker loop: ``python worker.py`` (see Procfile)."""
+    logger.info(f"Job worker started ({backend()} backend)")
+    with app.app_context():
+        if backend() == "redis":
+            _requeue_orphans()
+    while not (stop_event and stop_event.is_set()):
+        with app.app_context():
+            try:
+                _run_periodic()
+                handled = work_once()
+            except Exception as e:
+                logger.error(f"Job worker error: {e}")
+                handled = 0
+        if not handled and backend() == "db":
+            time.sleep(POLL_INTERVAL)
+
+
+def _ensure_inline_worker():
+    global _inline_worker
+    if not IN_PROCESS or _app is None or _inline_worker is not None:
+        return
+    with _inline_lock:
+        if _inline_worker is None:
+            _inline_worker = threading.Thread(target=run_worker, args=(_app,), name="jobs-inline", daemon=True)
+            _inline_worker.start()
+
+
+@periodic(PURGE_INTERVAL_SECONDS)
+def purge_finished_jobs():
+    """Drop done/failed jobs and receipts older than ``RETENTION``."""
+    cutoff = datetime.utcnow() - RETENTION
+    jobs_deleted = db.session.execute(
+        delete(BackgroundJob).where(BackgroundJob.status.in_(("done", "failed")), BackgroundJob.run_at < cutoff)
+    ).rowcount
+    receipts_deleted = db.session.execute(delete(JobReceipt).where(JobReceipt.processed_at < cutoff)).rowcount
+    db.session.commit()
+    if jobs_deleted or receipts_deleted:
+        logger.info(f"Purged {jobs_deleted} finished jobs and {receipts_deleted} job receipts")
@@ -0,0 +1,166 @@
+"""Per-request performance instrumentation and a Prometheus text endpoint.
+
+Records, per Flask endpoint: latency, SQL query count and SQL time (via
+SQLAlchemy engine events), template render time and response size. Each
+response gets a ``Server-Timing`` header, and queries slower than
+``SLOW_QUERY_MS`` are logged. Metrics are kept per process; with several
+gunicorn workers each one reports its own numbers.
+
+``/metrics`` answers scrapers that send ``Authorization: Bearer
+$METRICS_TOKEN`` and logged-in admins; everyone else gets 401, also when
+no token is configured.
+"""
+import os, hmac, time, bisect, logging, threading
+from collections import defaultdict
+
+from flask import g, request, session, has_request_context, before_render_template, template_rendered, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = defaultdict(lambda: [[0] * (len(buckets) + 1), 0.0, 0])
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            counts, _, _ = series = self._series[labels]
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        for labels, (counts, total, count) in sorted(snapshot.items()):
+            base = ",".join(f'{n}="{v}"' for n, v in zip(self.label_names, labels))
+            running = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                running += bucket_count
+                sep = "," if base else ""
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {running}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request handling time",
+                            ("endpoint", "method", "status"), LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram("http_request_db_queries", "SQL statements executed per request",
+                            ("endpoint",), QUERY_COUNT_BUCKETS)
+REQUEST_DB_TIME = Histogram("http_request_db_seconds", "Total SQL time per request",
+                            ("endpoint",), LATENCY_BUCKETS)
+TEMPLATE_RENDER = Histogram("template_render_seconds", "Jinja template render time",
+                            ("template",), LATENCY_BUCKETS)
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "Response body size",
+                          ("endpoint",), SIZE_BUCKETS)
+
+ALL_METRICS = (REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, TEMPLATE_RENDER, RESPONSE_SIZE)
+
+
+# ----------  SQLAlchemy hooks ----------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    if has_request_context() and "perf" in g:
+        g.perf["db_count"] += 1
+        g.perf["db_time"] += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())[:500]}")
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    # so later queries on this pooled connection are not timed against it
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+# ----------  Template hooks ----------
+def _before_render(sender, template, context, **extra):
+    if "perf" in g:
+        g.perf["tpl_start"] = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    if "perf" in g and "tpl_start" in g.perf:
+        elapsed = time.perf_counter() - g.perf.pop("tpl_start")
+        g.perf["tpl_time"] += elapsed
+        TEMPLATE_RENDER.observe((template.name or "string",), elapsed)
+
+
+# ----------  Request hooks ----------
+def _start_request():
+    g.perf = dict(start=time.perf_counter(), db_count=0, db_time=0.0, tpl_time=0.0)
+
+
+def _finish_request(response):
+    perf = g.pop("perf", None)
+    if perf is None or request.endpoint == "metrics":
+        return response
+
+    elapsed = time.perf_counter() - perf["start"]
+    endpoint = request.endpoint or "unmatched"
+    REQUEST_LATENCY.observe((endpoint, request.method, str(response.status_code)), elapsed)
+    REQUEST_QUERIES.observe((endpoint,), perf["db_count"])
+    REQUEST_DB_TIME.observe((endpoint,), perf["db_time"])
+    if not response.is_streamed:
+        RESPONSE_SIZE.observe((endpoint,), response.calculate_content_length() or 0)
+
+    response.headers["Server-Timing"] = ", ".join([
+        f"app;dur={elapsed * 1000:.1f}",
+        f'db;dur={perf["db_time"] * 1000:.1f};desc="{perf["db_count"]} queries"',
+        f"tpl;dur={perf['tpl_time'] * 1000:.1f}",
+    ])
+    return response
+
+
+def render_metrics():
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _authorized():
+    if METRICS_TOKEN and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        return True
+    return bool(session.get("is_admin"))
+
+
+def init_app(app):
+    """Attach the hooks to ``app`` and expose ``GET /metrics``."""
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    @app.route("/metrics")
+    def metrics():
+        if not _authorized():
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
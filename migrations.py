@@ -0,0 +1,134 @@
+"""Idempotent schema upgrades for databases created by older versions.
+
+``db.create_all()`` only creates missing tables; it never adds columns or
+indexes to tables that already exist. ``upgrade()`` fills those gaps and
+is safe to run on every start.
+"""
+import logging
+
+from sqlalchemy import inspect, select, update, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateTable
+
+from models import db, Order, OrderItem, OrderArchive, OrderItemArchive, normalize_phone
+from product_search import create_search_index
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_CHUNK = 1000
+
+# (table, column, DDL type) added after the table first shipped.
+# orders_archive copies the orders columns: list new orders columns for both.
+ADDED_COLUMNS = [
+    ("orders", "customer_phone_normalized", "VARCHAR(20)"),
+    ("orders", "product_image", "VARCHAR(500)"),
+    ("orders_archive", "product_image", "VARCHAR(500)"),
+    ("orders", "stock_released", "BOOLEAN NOT NULL DEFAULT FALSE"),
+    ("orders_archive", "stock_released", "BOOLEAN NOT NULL DEFAULT FALSE"),
+]
+
+
+def add_missing_columns():
+    """Add every missing ``ADDED_COLUMNS`` entry; returns the ``(table, column)`` pairs added."""
+    inspector = inspect(db.engine)
+    added = set()
+    for table, column, ddl_type in ADDED_COLUMNS:
+        if column not in {c["name"] for c in inspector.get_columns(table)}:
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}")
+            logger.info(f"Added column {table}.{column}")
+            added.add((table, column))
+    return added
+
+
+def create_missing_indexes():
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(db.engine, checkfirst=True)
+            except IntegrityError as e:
+                # A unique index over data that already has duplicates; keep
+                # starting and let an operator resolve the rows
+                logger.error(f"Could not create unique index {index.name}: {e.orig}")
+
+
+# Tables whose ids must never be reused, with the archive table sharing their ids
+AUTOINCREMENT_TABLES = [(Order, OrderArchive), (OrderItem, OrderItemArchive)]
+
+
+def ensure_autoincrement_ids():
+    """Rebuild SQLite ``orders``/``order_items`` tables created without AUTOINCREMENT.
+
+    Without it SQLite reuses the highest id once that row is deleted or
+    archived, so two orders share an id and archiving the second one fails
+    on the archive's primary key. SQLite cannot add AUTOINCREMENT in
+    place: the table is copied into a new one (its indexes are recreated
+    by ``create_missing_indexes``) and the id sequence starts above every
+    live or archived row.
+    """
+    if db.engine.dialect.name != "sqlite":
+        return
+    for model, archive_model in AUTOINCREMENT_TABLES:
+        table = model.__table__.name
+        with db.engine.begin() as conn:
+            current = conn.exec_driver_sql(
+                f"SELECT sql FROM sqlite_master WHERE type = 'table' AND name = '{table}'").scalar()
+            if "AUTOINCREMENT" in current.upper():
+                continue
+            ddl = str(CreateTable(model.__table__).compile(conn))
+            assert ddl.strip().startswith(f"CREATE TABLE {table} ")
+            columns = ", ".join(c.name for c in model.__table__.columns)
+            conn.exec_driver_sql(ddl.replace(f"CREATE TABLE {table} ", f"CREATE TABLE {table}_rebuild ", 1))
+            conn.exec_driver_sql(f"INSERT INTO {table}_rebuild ({columns}) SELECT {columns} FROM {table}")
+            conn.exec_driver_sql(f"DROP TABLE {table}")
+            conn.exec_driver_sql(f"ALTER TABLE {table}_rebuild RENAME TO {table}")
+            last_id = max(conn.execute(select(func.max(model.id))).scalar() or 0,
+                          conn.execute(select(func.max(archive_model.id))).scalar() or 0)
+            conn.exec_driver_sql(f"DELETE FROM sqlite_sequence WHERE name = '{table}'")
+            conn.exec_driver_sql(f"INSERT INTO sqlite_sequence (name, seq) VALUES ('{table}', {int(last_id)})")
+        logger.info(f"Rebuilt {table} with AUTOINCREMENT; new ids start after {last_id}")
+
+
+def backfill_normalized_phones(chunk_size=BACKFILL_CHUNK):
+    """Fill ``customer_phone_normalized`` for rows written before it existed."""
+    total = 0
+    while True:
+        rows = db.session.execute(
+            select(Order.id, Order.customer_phone)
+            .where(Order.customer_phone_normalized.is_(None))
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        db.session.execute(
+            update(Order),
+            [{"id": r.id, "customer_phone_normalized": normalize_phone(r.customer_phone)} for r in rows],
+        )
+        db.session.commit()
+        total += len(rows)
+    if total:
+        logger.info(f"Backfilled normalized phone for {total} orders")
+    return total
+
+
+def backfill_stock_released(added):
+    """Mark orders cancelled before ``stock_released`` existed as released.
+
+    Most of them were restocked when they were cancelled (reaper, batch
+    cancel); treating them all as released means reopening one reserves
+    its units again rather than ever handing out units twice.
+    """
+    for table in ("orders", "orders_archive"):
+        if (table, "stock_released") in added:
+            with db.engine.begin() as conn:
+                count = conn.exec_driver_sql(
+                    f"UPDATE {table} SET stock_released = TRUE WHERE order_status = 'cancelled'").rowcount
+            logger.info(f"Marked {count} cancelled rows of {table} as restocked")
+
+
+def upgrade():
+    backfill_stock_released(add_missing_columns())
+    ensure_autoincrement_ids()
+    create_missing_indexes()
+    create_search_index()
+    backfill_normalized_phones()
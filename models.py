@@ -1,10 +1,26 @@
+import re
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import validates
 
 db = SQLAlchemy()
 
 
+def normalize_phone(phone):
+    """Canonical form used for tracking lookups: digits only, last 10 digits.
+
+    "+91 98765-43210", "098765 43210" and "9876543210" all map to the same key.
+    """
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-10:] if len(digits) > 10 else digits
+
+
 class Product(db.Model):
+    __table_args__ = (
+        # Storefront price-range filter (see product_search.py)
+        db.Index("ix_product_price", "price"),
+    )
+
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text, nullable=False, default="Premium cookware item")
@@ -28,13 +44,29 @@ class Product(db.Model):
 
 class Order(db.Model):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Keyset pagination for the admin dashboard (newest first)
+        db.Index("ix_orders_created_at_id", "created_at", "id"),
+        # Dashboard filters
+        db.Index("ix_orders_order_status_created_at", "order_status", "created_at"),
+        db.Index("ix_orders_payment_status_created_at", "payment_status", "created_at"),
+        db.Index("ix_orders_payment_method_created_at", "payment_method", "created_at"),
+        # One order per UPI payment (NULLs are not compared)
+        db.Index("uq_orders_upi_transaction_id", "upi_transaction_id", unique=True),
+        # SQLite would otherwise hand a deleted or archived order's id to the
+        # next order (see migrations.ensure_autoincrement_ids)
+        {"sqlite_autoincrement": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     customer_name = db.Column(db.String(120), nullable=False)
     customer_phone = db.Column(db.String(20), nullable=False)
+    customer_phone_normalized = db.Column(db.String(20))
     customer_email = db.Column(db.String(120))
     product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
     product_name = db.Column(db.String(120), nullable=False)
+    # Catalog image at order time, so listings don't need the product row
+    product_image = db.Column(db.String(500))
     quantity = db.Column(db.Integer, nullable=False, default=1)
     total_amount = db.Column(db.Integer, nullable=False)
     payment_method = db.Column(db.String(50), nullable=False)
@@ -43,20 +75,32 @@ class Order(db.Model):
     upi_transaction_id = db.Column(db.String(120))
     payment_status = db.Column(db.String(50), default="pending")
     order_status = db.Column(db.String(50), default="pending")
+    # True once the order's units went back to Product.stock (cancelled);
+    # a reopened order reserves them again (see reaper.sync_stock)
+    stock_released = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    # Relationship
-    product = db.relationship('Product', backref='orders')
+    # Relationship; raise instead of lazy-loading one product per order
+    # (listings read product data through serializers.py)
+    product = db.relationship('Product', backref=db.backref('orders', lazy='raise_on_sql'), lazy='raise_on_sql')
+    items = db.relationship('OrderItem', backref='order', cascade='all, delete-orphan',
+                            order_by='OrderItem.id')
 
-    def to_dict(self):
-        return {
+    @validates('customer_phone')
+    def _normalize_customer_phone(self, key, phone):
+        self.customer_phone_normalized = normalize_phone(phone)
+        return phone
+
+    def to_dict(self, include_items=False):
+        data = {
             'id': self.id,
             'customer_name': self.customer_name,
             'customer_phone': self.customer_phone,
             'customer_email': self.customer_email,
             'product_id': self.product_id,
             'product_name': self.product_name,
+            'product_image': self.product_image,
             'quantity': self.quantity,
             'total_amount': self.total_amount,
             'payment_method': self.payment_method,
@@ -68,6 +112,159 @@ class Order(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if include_items:
+            data['items'] = [item.to_dict() for item in self.items]
+        return data
 
     def __repr__(self):
         return f'<Order {self.id} - {self.customer_name}>'
+
+
+# Order tracking: all orders for a phone number, newest first
+db.Index("ix_orders_phone_normalized_created_at",
+         Order.customer_phone_normalized, Order.created_at.desc())
+
+
+class OrderItem(db.Model):
+    """One product line of an order.
+
+    Orders placed before line items existed have no rows here; their
+    single product lives in ``Order.product_id``/``quantity``, which is
+    still filled in (first line, total quantity) for every new order.
+    """
+    __tablename__ = "order_items"
+    __table_args__ = {"sqlite_autoincrement": True}     # ids must not repeat in order_items_archive
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
+    product_name = db.Column(db.String(120), nullable=False)
+    unit_price = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    line_total = db.Column(db.Integer, nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'product_name': self.product_name,
+            'unit_price': self.unit_price,
+            'quantity': self.quantity,
+            'line_total': self.line_total
+        }
+
+    def __repr__(self):
+        return f'<OrderItem {self.order_id}:{self.product_id} x{self.quantity}>'
+
+
+def _archive_columns(table):
+    """Plain copies of ``table``'s columns: same names and types, no FKs or defaults."""
+    return [db.Column(c.name, c.type, primary_key=c.primary_key, autoincrement=False, nullable=c.nullable)
+            for c in table.columns]
+
+
+class OrderArchive(db.Model):
+    """Delivered/cancelled orders moved out of ``orders`` (see archive.py).
+
+    Same columns as ``Order``, so ``to_dict`` and the tracking page work
+    on either; ``order_items_archive`` holds their lines.
+    """
+    __table__ = db.Table(
+        "orders_archive", db.metadata,
+        *_archive_columns(Order.__table__),
+        db.Column("archived_at", db.DateTime, default=datetime.utcnow),
+        db.Index("ix_orders_archive_phone_normalized_created_at", "customer_phone_normalized", "created_at"),
+        db.Index("ix_orders_archive_created_at_id", "created_at", "id"),
+        db.Index("ix_orders_archive_upi_transaction_id", "upi_transaction_id"),
+    )
+
+    items = db.relationship('OrderItemArchive', primaryjoin='OrderArchive.id == foreign(OrderItemArchive.order_id)',
+                            order_by='OrderItemArchive.id', viewonly=True)
+
+    to_dict = Order.to_dict
+
+    def __repr__(self):
+        return f'<OrderArchive {self.id} - {self.customer_name}>'
+
+
+class OrderItemArchive(db.Model):
+    __table__ = db.Table(
+        "order_items_archive", db.metadata,
+        *_archive_columns(OrderItem.__table__),
+        db.Index("ix_order_items_archive_order_id", "order_id"),
+    )
+
+    to_dict = OrderItem.to_dict
+
+
+class DailySales(db.Model):
+    """Per IST day, product and payment method sales rollup (see analytics.py)."""
+    __tablename__ = "daily_sales"
+
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    payment_method = db.Column(db.String(50), primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailyOrderTotals(db.Model):
+    """Per IST day and payment method order totals.
+
+    Kept next to ``DailySales`` because a multi-line order shows up under
+    several products there and cannot be counted once from it.
+    """
+    __tablename__ = "daily_order_totals"
+
+    day = db.Column(db.Date, primary_key=True)
+    payment_method = db.Column(db.String(50), primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Integer, nullable=False, default=0)
+
+
+class BackgroundJob(db.Model):
+    """A queued job for the database-backed queue (see jobs.py)."""
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        # Worker poll: next due job
+        db.Index("ix_background_jobs_status_run_at", "status", "run_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(64), nullable=False)
+    key = db.Column(db.String(120), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class JobReceipt(db.Model):
+    """Keys of jobs whose effects are committed; makes redelivery a no-op."""
+    __tablename__ = "job_receipts"
+    __table_args__ = (
+        db.Index("ix_job_receipts_processed_at", "processed_at"),
+    )
+
+    key = db.Column(db.String(120), primary_key=True)
+    processed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class IdempotencyRecord(db.Model):
+    """Stored checkout response for an ``Idempotency-Key`` when Redis is not configured."""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        db.Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    key = db.Column(db.String(300), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)         # NULL while the first request is in flight
+    mimetype = db.Column(db.String(100))
+    body = db.Column(db.Text)
+    locked_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,159 @@
+"""Admin actions on many orders at once (``POST /admin/orders/batch``).
+
+Each batch is one transaction: the orders are loaded with their items in
+two queries, then the action runs as a single set-based ``UPDATE`` or
+``DELETE`` (plus one ``UPDATE ... CASE`` on ``product`` when stock goes
+back). Order events are emitted per order so the sales rollups follow.
+"""
+from datetime import datetime
+
+from sqlalchemy import update, delete, select
+from sqlalchemy.orm import selectinload
+
+from models import db, Order, OrderItem, Product
+from analytics import IST
+from inventory import release_lines, reserve_lines, run_with_retries
+from reaper import holds_stock, units_by_product
+import tasks
+
+MAX_BATCH = 1000
+ACTIONS = ("update", "cancel", "delete")
+ORDER_STATUSES = ("pending", "processing", "shipped", "delivered", "cancelled")
+PAYMENT_STATUSES = ("pending", "paid", "failed")
+
+
+def parse_batch(data):
+    """Validate a batch request body; raises ValueError with a client-facing message."""
+    action = data.get("action")
+    if action not in ACTIONS:
+        raise ValueError(f"action must be one of: {', '.join(ACTIONS)}")
+
+    try:
+        ids = sorted({int(i) for i in data.get("ids") or []})
+    except (TypeError, ValueError):
+        raise ValueError("ids must be a list of order ids")
+    if not ids:
+        raise ValueError("No orders selected")
+    if len(ids) > MAX_BATCH:
+        raise ValueError(f"A batch cannot have more than {MAX_BATCH} orders")
+
+    values = {}
+    if action == "update":
+        for field, allowed in (("order_status", ORDER_STATUSES), ("payment_status", PAYMENT_STATUSES)):
+            if data.get(field):
+                if data[field] not in allowed:
+                    raise ValueError(f"Invalid {field}: {data[field]}")
+                values[field] = data[field]
+        if not values:
+            raise ValueError("Nothing to update")
+        if values.get("order_status") == "cancelled":
+            # Cancelling gives stock back; only the cancel action does that
+            raise ValueError('Use action "cancel" to cancel orders')
+    return action, ids, values
+
+
+def _reserve_reopened(orders):
+    """Reserve stock for released orders being reopened; returns ``(reopened, short)``.
+
+    Orders are taken in id order while every product they need still has
+    the units; the rest are left cancelled.
+    """
+    stock = dict(db.session.execute(
+        select(Product.id, Product.stock).where(Product.id.in_(units_by_product(orders)))
+    ).all())
+    reopened, short = [], []
+    for order in orders:
+        needed = units_by_product([order])
+        if all(stock.get(pid, 0) >= qty for pid, qty in needed.items()):
+            for pid, qty in needed.items():
+                stock[pid] -= qty
+            reopened.append(order)
+        else:
+            short.append(order)
+    reserve_lines(units_by_product(reopened))
+    return reopened, short
+
+
+def _update(orders, values, now):
+    changed = [o for o in orders if any(getattr(o, f) != v for f, v in values.items())]
+    results = {o.id: "unchanged" for o in orders}
+    reopened = []
+    if "order_status" in values:
+        released = [o for o in changed if o.order_status == "cancelled" and o.stock_released]
+        reopened, short = _reserve_reopened(released)
+        for order in short:
+            results[order.id] = "insufficient_stock"
+        changed = [o for o in changed if o not in short]
+    if changed:
+        old = {o.id: (o.order_status, o.payment_status) for o in changed}
+        # ORM-enabled UPDATE also refreshes the loaded objects for the events below
+        db.session.execute(update(Order).where(Order.id.in_(old)).values(**values, updated_at=now))
+        if reopened:
+            db.session.execute(update(Order).where(Order.id.in_([o.id for o in reopened]))
+                               .values(stock_released=False))
+        for order in changed:
+            tasks.emit_order_status_changed(order, *old[order.id])
+            results[order.id] = "updated"
+    return results, bool(reopened)
+
+
+def _cancel(orders, now):
+    results = {}
+    targets = []
+    for order in orders:
+        if order.order_status == "cancelled":
+            results[order.id] = "unchanged"
+        elif not holds_stock(order):
+            results[order.id] = "not_cancellable"       # already shipped or delivered
+        else:
+            targets.append(order)
+    if targets:
+        old = {o.id: (o.order_status, o.payment_status) for o in targets}
+        db.session.execute(update(Order).where(Order.id.in_(old))
+                           .values(order_status="cancelled", stock_released=True, updated_at=now))
+        release_lines(units_by_product(targets))
+        for order in targets:
+            tasks.emit_order_status_changed(order, *old[order.id])
+            results[order.id] = "cancelled"
+    return results, bool(targets)
+
+
+def _delete(orders):
+    restock = [o for o in orders if holds_stock(o)]
+    release_lines(units_by_product(restock))
+    for order in orders:
+        tasks.emit_order_deleted(order)
+    ids = [o.id for o in orders]
+    db.session.execute(delete(OrderItem).where(OrderItem.order_id.in_(ids)))
+    db.session.execute(delete(Order).where(Order.id.in_(ids)))
+    return {order_id: "deleted" for order_id in ids}, bool(restock)
+
+
+def apply_batch(action, ids, values=None):
+    """Run ``action`` on ``ids`` in one transaction.
+
+    Returns ``(results, phones, restocked)``: ``results`` maps every
+    requested id to its outcome, ``phones`` are the customers whose
+    tracking pages changed, ``restocked`` tells whether stock went back.
+    """
+    def unit_of_work():
+        orders = (
+            Order.query.options(selectinload(Order.items))
+            .filter(Order.id.in_(ids))
+            .order_by(Order.id)
+            .with_for_update(of=Order)
+            .all()
+        )
+        phones = {o.customer_phone_normalized for o in orders}
+        now = datetime.now(IST)
+        if action == "update":
+            results, restocked = _update(orders, values, now)
+        elif action == "cancel":
+            results, restocked = _cancel(orders, now)
+        else:
+            results, restocked = _delete(orders)
+        db.session.commit()
+        return results, phones, restocked
+
+    results, phones, restocked = run_with_retries(unit_of_work)
+    return {i: results.get(i, "not_found") for i in ids}, phones, restocked
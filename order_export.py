@@ -0,0 +1,76 @@
+import io, csv, json, heapq
+
+from sqlalchemy import select
+
+from models import db, Order, OrderArchive
+from order_queries import order_filter_clauses
+
+# Rows are pulled from the database (and flushed to the client) in batches of this size
+EXPORT_BATCH = 1000
+FLUSH_BYTES = 64 * 1024
+
+EXPORT_COLUMNS = [
+    "id", "created_at", "customer_name", "customer_phone", "customer_email",
+    "product_id", "product_name", "quantity", "total_amount", "payment_method",
+    "upi_transaction_id", "payment_status", "order_status", "updated_at",
+]
+
+
+def _table_rows(model, filters, batch):
+    stmt = (
+        select(*(getattr(model, c) for c in EXPORT_COLUMNS))
+        .where(*order_filter_clauses(filters, table=model))
+        .order_by(model.id)
+        .execution_options(yield_per=batch)
+    )
+    return db.session.execute(stmt)
+
+
+def export_rows(filters, batch=EXPORT_BATCH):
+    """Yield plain row tuples for the export, oldest first.
+
+    Only the exported columns are selected, and ``yield_per`` makes the
+    driver use a server-side cursor where it has one, so memory stays
+    flat however many orders match. Hot and archived orders are two
+    id-ordered streams merged on the fly.
+    """
+    yield from heapq.merge(_table_rows(Order, filters, batch), _table_rows(OrderArchive, filters, batch),
+                           key=lambda row: row[0])
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def iter_csv(rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(v.isoformat() if hasattr(v, "isoformat") else v for v in row)
+        if buf.tell() >= FLUSH_BYTES:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def iter_ndjson(rows):
+    chunk = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_iso, ensure_ascii=False) + "\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield "".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield "".join(chunk)
+
+
+FORMATS = {
+    "csv": (iter_csv, "text/csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+}
@@ -0,0 +1,94 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select
+
+from models import db, Order, OrderArchive, normalize_phone
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Filters that map 1:1 onto an indexed ``orders`` column
+STATUS_FILTERS = ("order_status", "payment_status", "payment_method")
+
+
+def encode_cursor(created_at, order_id):
+    """Opaque keyset cursor pointing at the last row of a page."""
+    raw = json.dumps([created_at.isoformat() if created_at else None, order_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of ``encode_cursor``; raises ValueError on garbage input."""
+    try:
+        created_at, order_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(order_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def parse_date(value, end_of_day=False):
+    """Parse a ``YYYY-MM-DD`` query arg; ``end_of_day`` makes the bound exclusive."""
+    if not value:
+        return None
+    day = datetime.strptime(value, "%Y-%m-%d")
+    return day + timedelta(days=1) if end_of_day else day
+
+
+def parse_order_filters(args):
+    """Pull the supported filters out of ``request.args``."""
+    filters = {f: args.get(f, "").strip() for f in STATUS_FILTERS if args.get(f, "").strip()}
+    filters["date_from"] = parse_date(args.get("date_from", "").strip())
+    filters["date_to"] = parse_date(args.get("date_to", "").strip(), end_of_day=True)
+    filters["phone"] = normalize_phone(args.get("phone", "")) or None
+    return filters
+
+
+def order_filter_clauses(filters, table=Order):
+    """WHERE clauses for ``filters``; works for ORM queries and Core selects."""
+    clauses = [getattr(table, f) == filters[f] for f in STATUS_FILTERS if filters.get(f)]
+    if filters.get("date_from"):
+        clauses.append(table.created_at >= filters["date_from"])
+    if filters.get("date_to"):
+        clauses.append(table.created_at < filters["date_to"])
+    if filters.get("phone"):
+        clauses.append(table.customer_phone_normalized == filters["phone"])
+    return clauses
+
+
+def _page_rows(model, filters, cursor, limit, columns=None):
+    stmt = select(model) if columns is None else columns(model)
+    stmt = stmt.where(*order_filter_clauses(filters, table=model))
+
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < order_id),
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    result = db.session.execute(stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1))
+    return result.all() if columns is not None else result.scalars().all()
+
+
+def page_orders(filters, cursor=None, limit=DEFAULT_PAGE_SIZE, max_limit=MAX_PAGE_SIZE, include_archive=False,
+                columns=None):
+    """One newest-first page of orders using keyset pagination on (created_at, id).
+
+    With ``include_archive`` the same page is also read from
+    ``orders_archive`` and the two are merged, so callers see one list.
+    ``columns(model)`` swaps the ORM objects for plain rows from that
+    ``select()`` (e.g. ``serializers.order_select``).
+    Returns ``(orders, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    limit = max(1, min(int(limit), max_limit))
+    rows = _page_rows(Order, filters, cursor, limit, columns)
+    if include_archive:
+        rows = sorted(rows + _page_rows(OrderArchive, filters, cursor, limit, columns),
+                      key=lambda o: (o.created_at or datetime.min, o.id), reverse=True)[:limit + 1]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+    return rows, next_cursor
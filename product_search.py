@@ -0,0 +1,217 @@
+"""Full-text product search with price/stock filters and keyset pagination.
+
+SQLite uses an FTS5 table (``product_fts``) kept in sync with ``product``
+by triggers; PostgreSQL uses a GIN index over the same ``to_tsvector``
+expression the query uses. Other databases, or SQLite builds without
+FTS5, fall back to ``LIKE``. Matches are ranked by relevance (BM25 /
+``ts_rank_cd``, name weighted above description); without a query the
+catalog is listed by id. Pages are cut with a ``(rank, id)`` cursor.
+"""
+import os, re, json, base64, logging
+
+from sqlalchemy import select, func, text, table, column, literal_column, or_, and_
+
+from models import db, Product
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PAGE_SIZE = 24
+MAX_SEARCH_PAGE_SIZE = 100
+MAX_QUERY_TERMS = 8
+LIKE_ESCAPE = "\\"
+TS_CONFIG = os.getenv("SEARCH_TS_CONFIG", "english")
+
+PRODUCT_COLUMNS = (Product.id, Product.name, Product.description, Product.price, Product.image, Product.stock)
+
+product_fts = table("product_fts", column("rowid"))
+FTS_MATCH = literal_column("product_fts")
+
+PG_DOCUMENT = (f"setweight(to_tsvector('{TS_CONFIG}', coalesce(name, '')), 'A') || "
+               f"setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '')), 'B')")
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE product_fts USING fts5("
+    "name, description, content='product', content_rowid='id', tokenize='porter unicode61')",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    # Stock changes on every checkout; only name/description edits touch the index
+    """CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF name, description ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    "INSERT INTO product_fts(product_fts) VALUES ('rebuild')",
+]
+
+
+_backend = None
+
+
+def search_backend():
+    """"fts5", "tsvector" or "like"; resolved once per process."""
+    global _backend
+    if _backend is None:
+        dialect = db.engine.dialect.name
+        if dialect == "postgresql":
+            _backend = "tsvector"
+        elif dialect == "sqlite" and _has_fts_table():
+            _backend = "fts5"
+        else:
+            _backend = "like"
+    return _backend
+
+
+def _has_fts_table():
+    with db.engine.connect() as conn:
+        return conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_fts'")
+        ).first() is not None
+
+
+def create_search_index():
+    """Create the FTS5 table/triggers or the tsvector GIN index if missing."""
+    global _backend
+    _backend = None
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_product_search ON product USING GIN (({PG_DOCUMENT}))")
+    elif dialect == "sqlite" and not _has_fts_table():
+        try:
+            with db.engine.begin() as conn:
+                for ddl in SQLITE_DDL:
+                    conn.exec_driver_sql(ddl)
+            logger.info("Created product_fts search index")
+        except Exception as e:
+            logger.warning(f"FTS5 unavailable, product search falls back to LIKE: {e}")
+
+
+# ----------  Request parsing ----------
+def query_terms(q):
+    """Word tokens of the user's query; punctuation never reaches the FTS parser."""
+    return re.findall(r"\w+", q or "")[:MAX_QUERY_TERMS]
+
+
+def parse_search_filters(args):
+    """Pull ``q``, ``min_price``, ``max_price`` and ``in_stock`` out of ``request.args``.
+
+    Raises ValueError on malformed prices.
+    """
+    def price(name):
+        value = args.get(name, "").strip()
+        if not value:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"Invalid {name}")
+
+    return dict(
+        terms=query_terms(args.get("q")),
+        min_price=price("min_price"),
+        max_price=price("max_price"),
+        in_stock=args.get("in_stock", "").lower() in ("1", "true", "yes", "on"),
+    )
+
+
+def encode_cursor(rank, product_id):
+    raw = json.dumps([rank, product_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        rank, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (float(rank) if rank is not None else None), int(product_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+# ----------  Query building ----------
+def like_pattern(term):
+    """``%term%`` with ``%``, ``_`` and the escape character matched literally."""
+    for char in (LIKE_ESCAPE, "%", "_"):
+        term = term.replace(char, LIKE_ESCAPE + char)
+    return f"%{term}%"
+
+
+def _filter_clauses(filters):
+    clauses = []
+    if filters["min_price"] is not None:
+        clauses.append(Product.price >= filters["min_price"])
+    if filters["max_price"] is not None:
+        clauses.append(Product.price <= filters["max_price"])
+    if filters["in_stock"]:
+        clauses.append(Product.stock > 0)
+    return clauses
+
+
+def _matched(filters, backend):
+    """``(select with the text match applied, rank expression or None)``.
+
+    Ranks are ascending: lower is more relevant.
+    """
+    stmt = select(*PRODUCT_COLUMNS)
+    terms = filters["terms"]
+    if not terms:
+        return stmt, None
+
+    if backend == "fts5":
+        match = " ".join(f'"{t}"*' for t in terms)
+        rank = func.bm25(FTS_MATCH, 10.0, 1.0)
+        stmt = stmt.join(product_fts, product_fts.c.rowid == Product.id).where(FTS_MATCH.op("MATCH")(match))
+        return stmt, rank
+
+    if backend == "tsvector":
+        document = literal_column(PG_DOCUMENT)
+        tsquery = func.to_tsquery(literal_column(f"'{TS_CONFIG}'"), " & ".join(f"{t}:*" for t in terms))
+        stmt = stmt.where(document.op("@@")(tsquery))
+        return stmt, -func.ts_rank_cd(document, tsquery)
+
+    for term in terms:
+        pattern = like_pattern(term)
+        stmt = stmt.where(or_(Product.name.ilike(pattern, escape=LIKE_ESCAPE),
+                              Product.description.ilike(pattern, escape=LIKE_ESCAPE)))
+    return stmt, None
+
+
+def search_products(filters, cursor=None, limit=SEARCH_PAGE_SIZE):
+    """One page of matches as ``(products, next_cursor)``."""
+    limit = max(1, min(limit, MAX_SEARCH_PAGE_SIZE))
+    stmt, rank = _matched(filters, search_backend())
+    stmt = stmt.where(*_filter_clauses(filters))
+
+    if rank is None:
+        if cursor:
+            stmt = stmt.where(Product.id > decode_cursor(cursor)[1])
+        stmt = stmt.add_columns(literal_column("NULL").label("rank")).order_by(Product.id)
+    else:
+        if cursor:
+            last_rank, last_id = decode_cursor(cursor)
+            stmt = stmt.where(or_(rank > last_rank, and_(rank == last_rank, Product.id > last_id)))
+        stmt = stmt.add_columns(rank.label("rank")).order_by(rank, Product.id)
+
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+    products = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = products[-1]
+        next_cursor = encode_cursor(last["rank"], last["id"])
+    for product in products:
+        del product["rank"]
+    return products, next_cursor
+
+
+def search_facets(filters):
+    """Counts and price bounds for the text match, ignoring the other filters."""
+    matched, _ = _matched(filters, search_backend())
+    sub = matched.subquery()
+    total, in_stock, min_price, max_price = db.session.execute(
+        select(func.count(), func.count().filter(sub.c.stock > 0), func.min(sub.c.price), func.max(sub.c.price))
+    ).one()
+    return dict(total=total, in_stock=in_stock, min_price=min_price, max_price=max_price)
@@ -0,0 +1,156 @@
+"""Expire prepaid orders that were never paid and give their stock back.
+
+Checkout takes stock the moment an order is placed, while
+``payment_status`` starts as "pending". A prepaid order that is still
+pending, both in payment and fulfilment, ``PENDING_ORDER_TTL_MINUTES``
+after it was placed and never reported a payment is cancelled (payment
+"failed") and its units return to ``Product.stock``. Orders carrying a
+``upi_transaction_id`` are waiting for an admin to verify the payment,
+not abandoned, and are left alone.
+
+Orders are walked oldest first along ``ix_orders_payment_status_created_at``
+in batches of ``REAP_BATCH``; each batch is one transaction with one
+``UPDATE`` for the orders and one ``UPDATE ... CASE`` for the stock. Runs
+from ``flask expire-orders`` or periodically in the job worker.
+"""
+import os, time, logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import update, func
+from sqlalchemy.orm import selectinload
+
+from models import db, Order
+from analytics import IST, order_lines
+from inventory import release_lines, reserve_lines, run_with_retries
+from cache import catalog_cache, tracking_cache
+import jobs
+import tasks
+
+logger = logging.getLogger(__name__)
+
+PENDING_ORDER_TTL_MINUTES = int(os.getenv("PENDING_ORDER_TTL_MINUTES", "60"))
+# Cash on delivery is legitimately unpaid until it arrives
+REAP_PAYMENT_METHODS = tuple(os.getenv("REAP_PAYMENT_METHODS", "upi,bank_transfer").split(","))
+REAP_BATCH = int(os.getenv("REAP_BATCH", "500"))
+REAP_INTERVAL_SECONDS = int(os.getenv("REAP_INTERVAL_SECONDS", "300"))
+
+# Orders that have not left the shop; deleting or cancelling them frees their units
+RESTOCKABLE_STATUSES = {"pending", "processing"}
+
+
+def holds_stock(order, status=None):
+    """True while ``order``'s units are reserved and have not left the shop."""
+    status = order.order_status if status is None else status
+    return not order.stock_released and (status or "pending") in RESTOCKABLE_STATUSES
+
+
+def units_by_product(orders):
+    """``{product_id: units}`` summed over every line of ``orders``."""
+    units = {}
+    for order in orders:
+        for product_id, qty, _ in order_lines(order):
+            units[product_id] = units.get(product_id, 0) + qty
+    return units
+
+
+def sync_stock(order, old_status):
+    """Move stock for a status change of one order; returns True when it moved.
+
+    Cancelling an order that holds its units gives them back; reopening a
+    cancelled order whose units were released reserves them again and
+    raises InsufficientStock when they are gone.
+    """
+    new_status = order.order_status
+    if new_status == "cancelled" and old_status != "cancelled":
+        if holds_stock(order, old_status):
+            release_lines(units_by_product([order]))
+            order.stock_released = True
+            return True
+    elif old_status == "cancelled" and new_status != "cancelled" and order.stock_released:
+        reserve_lines(units_by_product([order]))
+        order.stock_released = False
+        return True
+    return False
+
+
+def _expired_clauses(cutoff, methods):
+    return (
+        Order.payment_status == "pending",
+        Order.created_at < cutoff,
+        func.coalesce(Order.order_status, "pending") == "pending",
+        Order.payment_method.in_(methods),
+        # Customer says it paid; an admin confirms or rejects it by hand
+        func.coalesce(Order.upi_transaction_id, "") == "",
+    )
+
+
+def _reap_batch(cutoff, methods, batch, after):
+    """Cancel and restock one batch; returns ``(scanned, reaped, last_key)``."""
+    query = Order.query.options(selectinload(Order.items)).filter(*_expired_clauses(cutoff, methods))
+    if after is not None:
+        query = query.filter((Order.created_at > after[0])
+                             | ((Order.created_at == after[0]) & (Order.id > after[1])))
+    orders = (
+        query.order_by(Order.created_at, Order.id)
+        .limit(batch)
+        .with_for_update(skip_locked=True, of=Order)
+        .all()
+    )
+    if not orders:
+        db.session.rollback()
+        return 0, [], after
+
+    old = {o.id: (o.order_status, o.payment_status) for o in orders}
+    # Re-check the conditions so an order paid since the SELECT is left alone
+    stmt = (
+        update(Order)
+        .where(Order.id.in_(old), *_expired_clauses(cutoff, methods))
+        .values(order_status="cancelled", payment_status="failed", stock_released=True,
+                updated_at=datetime.now(IST))
+        .execution_options(synchronize_session="fetch")
+    )
+    if db.session.get_bind().dialect.update_returning:
+        reaped_ids = set(db.session.execute(stmt.returning(Order.id)).scalars())
+    else:
+        db.session.execute(stmt)            # rows are locked FOR UPDATE above
+        reaped_ids = set(old)
+    reaped = [o for o in orders if o.id in reaped_ids]
+
+    release_lines(units_by_product(reaped))
+    for order in reaped:
+        tasks.emit_order_status_changed(order, *old[order.id])
+    db.session.commit()
+
+    last = orders[-1]
+    return len(orders), reaped, (last.created_at, last.id)
+
+
+def expire_unpaid_orders(ttl_minutes=None, batch=None, methods=None):
+    """Reap every expired order; returns ``{orders, batches, seconds}``."""
+    ttl_minutes = PENDING_ORDER_TTL_MINUTES if ttl_minutes is None else ttl_minutes
+    batch = batch or REAP_BATCH
+    methods = methods or REAP_PAYMENT_METHODS
+    cutoff = datetime.now(IST) - timedelta(minutes=ttl_minutes)
+
+    started = time.perf_counter()
+    total, batches, after = 0, 0, None
+    while True:
+        scanned, reaped, after = run_with_retries(lambda: _reap_batch(cutoff, methods, batch, after))
+        batches += bool(scanned)
+        if reaped:
+            total += len(reaped)
+            catalog_cache.bump()
+            for phone in {o.customer_phone_normalized for o in reaped}:
+                tracking_cache.delete(phone)
+        if scanned < batch:
+            break
+
+    result = dict(orders=total, batches=batches, seconds=round(time.perf_counter() - started, 3))
+    if total:
+        logger.info(f"Expired {total} unpaid orders in {result['seconds']}s ({batches} batches)")
+    return result
+
+
+@jobs.periodic(REAP_INTERVAL_SECONDS)
+def reap_unpaid_orders():
+    expire_unpaid_orders()
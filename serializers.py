@@ -0,0 +1,77 @@
+"""Column-level serialization for order and product listings.
+
+``Order.to_dict()`` needs a fully loaded ORM object per row: identity
+map, attribute instrumentation and a dict built field by field. Listing
+endpoints only need plain values, so ``order_select`` reads exactly the
+serialized columns as Core row tuples, with the product's catalog image
+joined in the same statement for orders placed before ``product_image``
+was snapshotted. ``OrjsonProvider`` makes ``jsonify`` encode with orjson.
+"""
+import orjson
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select, func
+
+from models import db, Product
+
+ORDER_FIELDS = [
+    "id", "customer_name", "customer_phone", "customer_email", "product_id", "product_name",
+    "quantity", "total_amount", "payment_method", "customer_address", "notes",
+    "upi_transaction_id", "payment_status", "order_status", "created_at", "updated_at",
+]
+_ORDER_KEYS = ORDER_FIELDS + ["product_image"]     # column order of order_select()
+PRODUCT_EDITOR_FIELDS = ["id", "name", "description", "price", "image"]
+
+
+# ----------  Orders ----------
+def order_select(model):
+    """``select()`` of the serialized columns of ``model`` (Order or OrderArchive)."""
+    columns = [model.__table__.c[name] for name in ORDER_FIELDS]
+    return (
+        select(*columns, func.coalesce(model.product_image, Product.image).label("product_image"))
+        .outerjoin(Product, Product.id == model.product_id)
+    )
+
+
+def order_dict(row):
+    """Same keys as ``Order.to_dict()`` for a row from ``order_select``."""
+    data = dict(zip(_ORDER_KEYS, row))
+    created_at, updated_at = data["created_at"], data["updated_at"]
+    data["created_at"] = created_at.isoformat() if created_at else None
+    data["updated_at"] = updated_at.isoformat() if updated_at else None
+    return data
+
+
+# ----------  Products ----------
+def product_editor_dicts():
+    """Fields the admin product editor shows, in id order."""
+    columns = [Product.__table__.c[name] for name in PRODUCT_EDITOR_FIELDS]
+    return [row._asdict() for row in db.session.execute(select(*columns).order_by(Product.id))]
+
+
+# ----------  JSON ----------
+class OrjsonProvider(DefaultJSONProvider):
+    """``app.json`` provider that encodes and decodes with orjson.
+
+    Output matches the default provider: sorted keys, compact unless
+    pretty-printing, and dates, decimals etc. go through Flask's
+    ``default`` hook. Anything orjson rejects (e.g. ints wider than 64
+    bits) falls back to the stdlib encoder. Non-ASCII text is emitted as
+    UTF-8 rather than ``\\u`` escapes.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+        except TypeError:                   # orjson.JSONEncodeError
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers see the usual error
+        return orjson.loads(s)
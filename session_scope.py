@@ -0,0 +1,40 @@
+"""Keep server-side session I/O off the storefront.
+
+Flask-Session loads the session on every request that carries a cookie
+and, as shipped, writes it back on every request that has data in it.
+Only the admin area (and ``/metrics``) uses the session, so ``ScopedSessionInterface`` hands
+every other path a throwaway in-memory session and never touches the
+store for it. On admin paths the session is loaded as before but only
+written when it changed (login/logout), so its Redis TTL runs from login
+and is bounded by ``PERMANENT_SESSION_LIFETIME``.
+"""
+from flask.sessions import SessionInterface, SecureCookieSession
+
+# Paths that read or write the session (/metrics accepts an admin login)
+SESSION_PATH_PREFIXES = ("/admin", "/metrics")
+
+
+class TransientSession(SecureCookieSession):
+    """Session for paths outside the scope; never loaded or saved."""
+
+
+class ScopedSessionInterface(SessionInterface):
+    def __init__(self, backend, prefixes=SESSION_PATH_PREFIXES):
+        self.backend = backend
+        self.prefixes = tuple(prefixes)
+
+    def uses_session(self, request):
+        return request.path.startswith(self.prefixes)
+
+    def open_session(self, app, request):
+        if not self.uses_session(request):
+            return TransientSession()
+        return self.backend.open_session(app, request)
+
+    def save_session(self, app, session, response):
+        if isinstance(session, TransientSession) or not session.modified:
+            return
+        self.backend.save_session(app, session, response)
+
+    def is_null_session(self, obj):
+        return self.backend.is_null_session(obj)
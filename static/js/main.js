@@ -46,24 +46,26 @@ function initImageZoom() {
 
         setupZoomableImages() {
             const zoomableContainers = document.querySelectorAll('.zoomable-image-container');
+            zoomableContainers.forEach(container => this.bindZoomable(container));
+        }
 
-            zoomableContainers.forEach(container => {
-                const image = container.querySelector('.zoomable-image');
-                if (image) {
-                    // Click opens modal
-                    container.addEventListener('click', (e) => {
-                        e.preventDefault();
-                        e.stopPropagation();
-                        this.openZoomModal(container);
-                    });
-
-                    // Prevent text selection on double‑click
-                    container.addEventListener('selectstart', e => e.preventDefault());
-
-                    // Show loading spinner until the image finishes
-                    this.setupImageLoading(image);
-                }
-            });
+        // Also called for product cards added after page load
+        bindZoomable(container) {
+            const image = container.querySelector('.zoomable-image');
+            if (image) {
+                // Click opens modal
+                container.addEventListener('click', (e) => {
+                    e.preventDefault();
+                    e.stopPropagation();
+                    this.openZoomModal(container);
+                });
+
+                // Prevent text selection on double‑click
+                container.addEventListener('selectstart', e => e.preventDefault());
+
+                // Show loading spinner until the image finishes
+                this.setupImageLoading(image);
+            }
         }
 
         setupImageLoading(image) {
@@ -262,6 +264,7 @@ function initializeApp() {
     initAdminModal();
     initButtonLoading();
     initImageZoom();
+    initProductListing();
     console.log('Banaras Bartan website initialized successfully');
 }
 
@@ -289,6 +292,182 @@ function initSmoothScrolling() {
     });
 }
 
+/* ────────────────  Product Listing (search + lazy pages)  ──────────────── */
+
+const FALLBACK_PRODUCT_IMAGE = 'https://images.unsplash.com/photo-1556909114-9e59f5a3c13b?w=400&h=300&fit=crop';
+
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : String(value);
+    return div.innerHTML.replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+}
+
+function renderProductCard(product) {
+    const name = escapeHtml(product.name);
+    const image = escapeHtml(product.image);
+    const inStock = product.stock > 0;
+    const col = document.createElement('div');
+    col.className = 'col-lg-4 col-md-6';
+    col.innerHTML = `
+        <div class="product-card h-100">
+            <div class="zoomable-image-container position-relative" data-title="${name}" data-image="${image}">
+                <img class="product-image zoomable-image" src="${image}" alt="${name}" loading="lazy"
+                    onerror="this.src='${FALLBACK_PRODUCT_IMAGE}';" />
+                <div class="product-overlay"><i class="fas fa-search-plus"></i></div>
+            </div>
+            <div class="product-content">
+                <h5 class="product-name" id="name${product.id}">${name}</h5>
+                <p class="product-description">${escapeHtml(product.description)}</p>
+                <div class="product-price" id="price${product.id}">₹${product.price}</div>
+                <div class="product-stock mb-3">
+                    <small class="text-muted">
+                        ${inStock
+                            ? `<i class="fas fa-check-circle text-success me-1"></i>${product.stock} in stock`
+                            : '<i class="fas fa-times-circle text-danger me-1"></i>Out of stock'}
+                    </small>
+                </div>
+                <div class="product-actions">
+                    ${inStock
+                        ? `<a href="/order-form/${product.id}" class="btn btn-primary btn-action">
+                               <i class="fas fa-shopping-cart me-2"></i>Order Now</a>`
+                        : `<button class="btn btn-secondary btn-action" disabled>
+                               <i class="fas fa-ban me-2"></i>Out of Stock</button>`}
+                    <a href="https://wa.me/917571059297?text=${encodeURIComponent('Hello, I want to purchase: ' + product.name)}"
+                        target="_blank" class="btn btn-success btn-action">
+                        <i class="fab fa-whatsapp me-2"></i>WhatsApp Order
+                    </a>
+                </div>
+            </div>
+        </div>
+    `;
+    return col;
+}
+
+// Admin editor card, same markup as the server-rendered ones in index.html
+function renderEditorCard(product) {
+    const col = document.createElement('div');
+    col.className = 'col-md-4';
+    col.innerHTML = `
+        <div class="card">
+            <div class="card-header d-flex justify-content-between align-items-center">
+                <h6 class="mb-0">Product ${product.id}</h6>
+                <button type="button" class="btn btn-sm btn-outline-danger" onclick="removeProduct('${product.id}')">
+                    <i class="fas fa-trash"></i>
+                </button>
+            </div>
+            <div class="card-body">
+                <div class="mb-3">
+                    <label class="form-label">Product Name</label>
+                    <input type="text" id="inputName${product.id}" class="form-control product-input" value="${escapeHtml(product.name)}">
+                </div>
+                <div class="mb-3">
+                    <label class="form-label">Description</label>
+                    <textarea id="inputDescription${product.id}" class="form-control product-input" rows="2">${escapeHtml(product.description)}</textarea>
+                </div>
+                <div class="mb-3">
+                    <label class="form-label">Price (₹)</label>
+                    <input type="number" id="inputPrice${product.id}" class="form-control product-input" value="${product.price}">
+                </div>
+                <div class="mb-3">
+                    <label class="form-label">Stock</label>
+                    <input type="number" id="inputStock${product.id}" class="form-control product-input" value="${product.stock}">
+                </div>
+                <div class="mb-3">
+                    <label class="form-label">Image URL</label>
+                    <input type="url" id="inputImage${product.id}" class="form-control product-input"
+                        value="${escapeHtml(product.image)}" placeholder="https://example.com/image.jpg">
+                </div>
+            </div>
+        </div>
+    `;
+    return col;
+}
+
+function initProductListing() {
+    const grid = document.getElementById('productGrid');
+    const sentinel = document.getElementById('productsSentinel');
+    const form = document.getElementById('productSearchForm');
+    if (!grid || !sentinel || !form) return;
+
+    let nextCursor = sentinel.dataset.nextCursor || null;
+    let searchParams = new URLSearchParams();
+    let loading = false;
+
+    function appendProducts(products) {
+        const editor = document.getElementById('productInputs');
+        const firstNewCard = editor?.querySelector('.new-product-card');
+        products.forEach(product => {
+            const card = renderProductCard(product);
+            grid.appendChild(card);
+            window.imageZoom?.bindZoomable(card.querySelector('.zoomable-image-container'));
+            // Keep unsaved "new product" cards at the end of the editor
+            if (editor && !document.getElementById(`inputName${product.id}`)) {
+                editor.insertBefore(renderEditorCard(product), firstNewCard || null);
+            }
+        });
+    }
+
+    async function fetchPage(cursor) {
+        const params = new URLSearchParams(searchParams);
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`/products/search?${params}`);
+        const data = await response.json();
+        if (!data.success) throw new Error(data.message || 'Search failed');
+        return data;
+    }
+
+    function setCursor(cursor) {
+        nextCursor = cursor;
+        sentinel.classList.toggle('d-none', !nextCursor);
+    }
+
+    window.loadMoreProducts = async function () {
+        if (loading || !nextCursor) return;
+        loading = true;
+        try {
+            const data = await fetchPage(nextCursor);
+            appendProducts(data.products);
+            setCursor(data.next_cursor);
+        } catch (error) {
+            showAlert(`Could not load more products: ${error.message}`, 'danger');
+        } finally {
+            loading = false;
+        }
+    };
+
+    form.addEventListener('submit', async function (e) {
+        e.preventDefault();
+        searchParams = new URLSearchParams();
+        new FormData(form).forEach((value, key) => {
+            if (String(value).trim()) searchParams.set(key, String(value).trim());
+        });
+
+        loading = true;
+        try {
+            const data = await fetchPage(null);
+            grid.innerHTML = '';
+            document.querySelectorAll('#productInputs > .col-md-4:not(.new-product-card)').forEach(c => c.remove());
+            appendProducts(data.products);
+            setCursor(data.next_cursor);
+
+            const facets = data.facets;
+            document.getElementById('productSearchSummary').textContent = facets.total
+                ? `${facets.total} products (${facets.in_stock} in stock), ₹${facets.min_price}–₹${facets.max_price}`
+                : 'No products match your search';
+        } catch (error) {
+            showAlert(`Search failed: ${error.message}`, 'danger');
+        } finally {
+            loading = false;
+        }
+    });
+
+    // Fetch the next page shortly before the user reaches the end of the grid
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) window.loadMoreProducts();
+    }, { rootMargin: '400px 0px' });
+    observer.observe(sentinel);
+}
+
 // Initialize scroll animations
 function initScrollAnimations() {
     const observerOptions = {
@@ -347,6 +526,7 @@ function initAdminModal() {
                 document.getElementById('adminLogin').classList.add('d-none');
                 document.getElementById('adminPanel').classList.remove('d-none');
                 showAlert('Admin login successful', 'success');
+                refreshEditorStock();
                 
                 // Verify session is maintained
                 setTimeout(() => {
@@ -380,6 +560,26 @@ function initAdminModal() {
     };
 }
 
+// The server-rendered editor cards come from the cached catalog, so their
+// stock can be behind; load it live before the admin edits and saves it
+async function refreshEditorStock() {
+    const ids = [...document.querySelectorAll('#productInputs input[id^="inputStock"]')]
+        .map(input => input.id.replace('inputStock', ''))
+        .filter(id => /^\d+$/.test(id));
+    if (ids.length === 0) return;
+
+    try {
+        const response = await fetch(`/admin/products/stock?ids=${ids.join(',')}`);
+        const data = await response.json();
+        if (!data.success) throw new Error(data.message || 'Request failed');
+        ids.forEach(id => {
+            if (id in data.stock) document.getElementById(`inputStock${id}`).value = data.stock[id];
+        });
+    } catch (error) {
+        showAlert(`Could not load current stock: ${error.message}`, 'warning');
+    }
+}
+
 // Initialize button loading states
 function initButtonLoading() {
     window.showButtonLoading = function(button, duration = 1000) {
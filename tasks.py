@@ -0,0 +1,62 @@
+"""Order events and the background handlers that react to them.
+
+Request handlers call the ``emit_*`` helpers inside the transaction that
+changes the order; the work itself runs later in the job worker (see
+jobs.py), so checkout latency only covers the order commit.
+"""
+import logging
+
+import analytics
+import jobs
+
+logger = logging.getLogger(__name__)
+
+
+# ----------  Emitters (called from request handlers) ----------
+def emit_order_created(order):
+    """``order`` must be flushed so it has an id."""
+    jobs.enqueue("order.created", dict(
+        order_id=order.id,
+        order_status=order.order_status or "pending",
+        snapshot=analytics.order_snapshot(order),
+    ))
+
+
+def emit_order_status_changed(order, old_status, old_payment_status):
+    jobs.enqueue("order.status_changed", dict(
+        order_id=order.id,
+        old_status=old_status,
+        new_status=order.order_status,
+        old_payment_status=old_payment_status,
+        new_payment_status=order.payment_status,
+        snapshot=analytics.order_snapshot(order),
+    ))
+
+
+def emit_order_deleted(order):
+    jobs.enqueue("order.deleted", dict(
+        order_id=order.id,
+        order_status=order.order_status,
+        snapshot=analytics.order_snapshot(order),
+    ))
+
+
+# ----------  Handlers (run by the job worker) ----------
+@jobs.handler("order.created")
+def on_order_created(payload):
+    if analytics.counts_towards_sales(payload["order_status"]):
+        analytics.apply_snapshot(payload["snapshot"], 1)
+    logger.info(f"Processed order.created for order {payload['order_id']}")
+
+
+@jobs.handler("order.status_changed")
+def on_order_status_changed(payload):
+    analytics.apply_status_change(payload["snapshot"], payload["old_status"], payload["new_status"])
+    logger.info(f"Order {payload['order_id']}: order {payload['old_status']} -> {payload['new_status']}, "
+                f"payment {payload['old_payment_status']} -> {payload['new_payment_status']}")
+
+
+@jobs.handler("order.deleted")
+def on_order_deleted(payload):
+    if analytics.counts_towards_sales(payload["order_status"]):
+        analytics.apply_snapshot(payload["snapshot"], -1)
@@ -0,0 +1,21 @@
+from models import db, Product
+
+
+def test_stock_requires_admin(client):
+    assert client.get("/admin/products/stock?ids=1").status_code == 403
+
+
+def test_stock_is_read_live_not_from_catalog_cache(app, admin):
+    admin.get("/")                                  # fill the catalog cache
+    with app.app_context():
+        product = Product.query.order_by(Product.id).first()
+        product_id, stock = product.id, product.stock
+        product.stock = stock - 1                   # an order that does not bump the cache
+        db.session.commit()
+    try:
+        response = admin.get(f"/admin/products/stock?ids={product_id},x")
+        assert response.get_json() == dict(success=True, stock={str(product_id): stock - 1})
+    finally:
+        with app.app_context():
+            db.session.get(Product, product_id).stock = stock
+            db.session.commit()
@@ -0,0 +1,24 @@
+import json
+
+import assets
+
+
+def test_index_revalidates_while_build_is_unchanged(client):
+    etag = client.get("/").headers["ETag"]
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_index_etag_changes_with_asset_manifest(app, client, tmp_path):
+    etag = client.get("/").headers["ETag"]
+
+    dist = tmp_path / assets.DIST_DIR
+    dist.mkdir()
+    (dist / assets.MANIFEST).write_text(json.dumps({"css/style.css": "css/style.6b4d00cf5a5e.css"}))
+    assets.load_manifest(str(tmp_path))
+    try:
+        response = client.get("/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert "/assets/css/style.6b4d00cf5a5e.css" in response.get_data(as_text=True)
+    finally:
+        assets.load_manifest(app.static_folder)
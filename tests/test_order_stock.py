@@ -0,0 +1,70 @@
+"""Stock must come back exactly once however an order's status wanders."""
+import pytest
+
+import reaper
+from models import db, Product, Order
+
+STOCK, QTY = 10, 3
+
+
+@pytest.fixture
+def product_id(app):
+    with app.app_context():
+        product = Product(name="Test Tawa", description="Test", price=500, image="", stock=STOCK)
+        db.session.add(product)
+        db.session.commit()
+        return product.id
+
+
+def stock(app, product_id):
+    with app.app_context():
+        return db.session.get(Product, product_id).stock
+
+
+def place_order(admin, product_id):
+    response = admin.post("/order/create", json=dict(
+        product_id=product_id, quantity=QTY, customer_name="Test", customer_phone="9876543210",
+        payment_method="upi"))
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()["order_id"]
+
+
+def set_status(admin, order_id, status):
+    response = admin.post(f"/admin/orders/{order_id}/update", json=dict(order_status=status))
+    assert response.status_code == 200, response.get_json()
+
+
+@pytest.mark.parametrize("history", [
+    ["cancelled", "pending"],
+    ["shipped", "cancelled", "pending"],
+    ["cancelled", "pending", "cancelled", "processing"],
+])
+def test_reopened_order_restocks_once_on_delete(app, admin, product_id, history):
+    order_id = place_order(admin, product_id)
+    for status in history:
+        set_status(admin, order_id, status)
+    assert stock(app, product_id) == STOCK - QTY
+
+    assert admin.delete(f"/admin/orders/{order_id}").status_code == 200
+    assert stock(app, product_id) == STOCK
+
+
+@pytest.mark.parametrize("history", [
+    ["cancelled", "pending"],
+    ["shipped", "cancelled", "pending"],
+])
+def test_reopened_order_restocks_once_when_reaped(app, admin, product_id, history):
+    order_id = place_order(admin, product_id)
+    for status in history:
+        set_status(admin, order_id, status)
+    assert stock(app, product_id) == STOCK - QTY
+
+    with app.app_context():
+        reaper.expire_unpaid_orders(ttl_minutes=-1)
+        order = db.session.get(Order, order_id)
+        assert (order.order_status, order.stock_released) == ("cancelled", True)
+    assert stock(app, product_id) == STOCK
+
+    # Already released: deleting the reaped order must not add the units again
+    assert admin.delete(f"/admin/orders/{order_id}").status_code == 200
+    assert stock(app, product_id) == STOCK
@@ -0,0 +1,28 @@
+import pytest
+
+import product_search
+from models import db, Product
+
+
+@pytest.fixture
+def like_backend(app, monkeypatch):
+    monkeypatch.setattr(product_search, "_backend", "like")
+    with app.app_context():
+        products = [Product(name=name, description="Test", price=100, image="", stock=1)
+                    for name in ("Steel abc_jar", "Steel abcxjar")]
+        db.session.add_all(products)
+        db.session.commit()
+        yield
+        for product in products:
+            db.session.delete(product)
+        db.session.commit()
+
+
+def test_like_pattern_escapes_wildcards():
+    assert product_search.like_pattern("a_b%c\\d") == "%a\\_b\\%c\\\\d%"
+
+
+def test_like_fallback_matches_underscore_literally(like_backend):
+    filters = product_search.parse_search_filters({"q": "abc_jar"})
+    products, _ = product_search.search_products(filters)
+    assert [p["name"] for p in products] == ["Steel abc_jar"]
@@ -0,0 +1,6 @@
+"""Background job worker: ``python worker.py`` (the ``worker`` Procfile entry)."""
+import jobs
+from app import app
+
+if __name__ == "__main__":
+    jobs.run_worker(app)